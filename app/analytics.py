@@ -0,0 +1,118 @@
+from contextlib import closing
+from typing import List, Tuple
+
+from app.config import TICKET_STORE_PATH
+from app.ticket_store import connect
+
+# The only columns an analytics query may filter or group by
+ANALYTICS_COLUMNS = [
+    "priority",
+    "state",
+    "assignment_group",
+    "category",
+    "location",
+    "caller",
+    "assigned_to",
+    "updated_by",
+]
+DATE_COLUMNS = ["created", "updated", "resolved_time"]
+
+# Stored as-is by ingestion; every other analytics column is lowercased there
+UNNORMALIZED_COLUMNS = ["updated_by"]
+
+METRIC_SQL = {
+    "count": "COUNT(*) AS incident_count",
+    "avg_resolution_hours": (
+        "ROUND(AVG((julianday(resolved_time) - julianday(created)) * 24), 2) "
+        "AS avg_resolution_hours"
+    ),
+}
+
+MAX_ROWS = 50
+
+
+def build_analytics_sql(spec: dict) -> Tuple[str, list]:
+    """
+    Turns an AnalyticsQuery into parameterized SQL. Column names only ever come
+    from the allow-lists above; every value is bound as a parameter.
+    """
+    conditions, params = [], []
+
+    filters = spec.get("filters")
+    if not isinstance(filters, dict):
+        filters = {}
+    for column, value in filters.items():
+        if column not in ANALYTICS_COLUMNS:
+            print(f"Ignoring filter on non-analytics column: {column}")
+            continue
+        values = value if isinstance(value, list) else [value]
+        if not values:
+            # "IN ()" would match nothing
+            print(f"Ignoring filter without values on: {column}")
+            continue
+        placeholders = ", ".join("?" for _ in values)
+        # Compare the stored column directly so its index can be used
+        target = f"lower({column})" if column in UNNORMALIZED_COLUMNS else column
+        conditions.append(f"{target} IN ({placeholders})")
+        params.extend(str(v).strip().lower() for v in values)
+
+    date_field = spec.get("date_field") or "created"
+    if date_field not in DATE_COLUMNS:
+        date_field = "created"
+    try:
+        within_days = int(spec.get("within_days") or 0)
+    except (TypeError, ValueError):
+        print(f"Ignoring non-numeric within_days: {spec.get('within_days')}")
+        within_days = 0
+    if within_days < 0:
+        # julianday() turns "--5 days" into NULL, matching nothing
+        print(f"Ignoring negative within_days: {within_days}")
+        within_days = 0
+    if within_days:
+        conditions.append(f"julianday({date_field}) >= julianday('now', ?)")
+        params.append(f"-{within_days} days")
+
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    metric = spec.get("metric") or "count"
+    if metric not in METRIC_SQL and metric != "list":
+        print(f"Ignoring unknown analytics metric: {metric}")
+        metric = "count"
+    group_by = spec.get("group_by")
+    if group_by not in ANALYTICS_COLUMNS:
+        group_by = None
+
+    if metric == "list":
+        sql = (
+            "SELECT incident_number, title, priority, state, assignment_group, "
+            f"created, resolved_time FROM tickets{where} "
+            f"ORDER BY created DESC LIMIT {MAX_ROWS}"
+        )
+    elif group_by:
+        sql = (
+            f"SELECT {group_by}, {METRIC_SQL[metric]} FROM tickets{where} "
+            f"GROUP BY {group_by} ORDER BY 2 DESC LIMIT {MAX_ROWS}"
+        )
+    else:
+        sql = f"SELECT {METRIC_SQL[metric]} FROM tickets{where}"
+    return sql, params
+
+
+def run_analytics_query(spec: dict, store_path: str = TICKET_STORE_PATH) -> List[dict]:
+    sql, params = build_analytics_sql(spec)
+    print(f"Analytics SQL: {sql} {params}")
+    with closing(connect(store_path)) as connection:
+        rows = connection.execute(sql, params).fetchall()
+    return [dict(row) for row in rows]
+
+
+def format_table(rows: List[dict]) -> str:
+    """Renders result rows as a small markdown table for the answer prompt."""
+    if not rows:
+        return "No tickets matched."
+    columns = list(rows[0])
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "| " + " | ".join("---" for _ in columns) + " |",
+    ]
+    lines += ["| " + " | ".join(str(row[c]) for c in columns) + " |" for row in rows]
+    return "\n".join(lines)
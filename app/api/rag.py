@@ -1,12 +1,34 @@
+import asyncio
+import functools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, field_validator
 import uuid
 from langchain_core.messages import HumanMessage
 from langchain.schema import Document
 from datetime import datetime, timezone
-from app.services import load_vector_db
-from app.graph.workflow import final_graph
-import uuid
+from app.services import FEEDBACK_COLLECTION_NAME, load_vector_db
+from app.graph.tool_executor import SharedRetrieval
+from app.feedback_compaction import (
+    compact_feedback,
+    find_incident_numbers,
+    normalize_query,
+)
+from app.retrieval_cache import (
+    FEEDBACK_COLLECTION,
+    bump_collection_version,
+    retrieval_cache,
+)
+from app.ticket_store import TICKET_FIELDS, get_tickets
+from app.scheduler import (
+    Priority,
+    SchedulerOverloaded,
+    request_priority,
+    scheduler_metrics,
+)
 
 router = APIRouter()
 
@@ -14,32 +36,177 @@ router = APIRouter()
 class QueryRequest(BaseModel):
     query: str
     session_id: str = None
+    fields: Optional[List[str]] = Field(
+        None,
+        description=(
+            "Ticket fields to return for each document. "
+            "By default only the incident number and filterable fields."
+        ),
+    )
 
+    @field_validator("fields")
+    @classmethod
+    def check_fields(cls, fields):
+        unknown = [field for field in fields or [] if field not in TICKET_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown ticket fields: {unknown}")
+        return fields
 
-@router.post("/search_vector_documents")
-async def search_vector_documents(request: QueryRequest):
-    query = request.query
 
-    if request.session_id:
-        thread_id = request.session_id
+class BatchQueryRequest(BaseModel):
+    queries: List[QueryRequest] = Field(
+        ..., description="Independent queries, each with an optional session id."
+    )
+    max_concurrency: int = Field(
+        4, ge=1, le=32, description="How many conversations run at the same time."
+    )
+
+
+def run_conversation_turn(
+    query: str,
+    session_id: Optional[str] = None,
+    shared_retrieval: Optional[SharedRetrieval] = None,
+    priority: Priority = Priority.INTERACTIVE,
+    fields: Optional[List[str]] = None,
+):
+    """Runs one user query through the graph and builds the API response."""
+    if session_id:
+        thread_id = session_id
         print(f"Continuing conversation with thread_id: {thread_id}")
     else:
         thread_id = str(uuid.uuid4())
         print(f"Starting new conversation with thread_id: {thread_id}")
 
-    config = {"configurable": {"thread_id": thread_id}}
+    config = {
+        "configurable": {"thread_id": thread_id, "shared_retrieval": shared_retrieval}
+    }
+
+    # Imported on first use: compiling the graph loads the chains and LLM clients
+    from app.graph.workflow import final_graph
 
     inputs = {"messages": [HumanMessage(content=query)], "query": query}
 
-    final_state = final_graph.invoke(inputs, config)
+    with request_priority(priority):
+        final_state = final_graph.invoke(inputs, config)
 
-    response = {
+    return {
         "result": final_state["answer"],
-        "documents": final_state["metadata"],
+        "documents": project_documents(final_state.get("metadata") or [], fields),
         "session_id": thread_id,
     }
 
-    return response
+
+def project_documents(metadata_list: List[dict], fields: Optional[List[str]]):
+    """
+    One entry per retrieved incident. Without `fields` the slim vector store
+    metadata is returned as is; otherwise the requested fields are fetched
+    from the ticket store.
+    """
+    documents = {}
+    for metadata in metadata_list:
+        documents.setdefault(metadata.get("incident_number"), metadata)
+    documents.pop(None, None)
+
+    if not fields:
+        return list(documents.values())
+
+    tickets = get_tickets(list(documents), fields)
+    return [
+        {"incident_number": number, **tickets.get(number, {})} for number in documents
+    ]
+
+
+def overloaded_error(error: SchedulerOverloaded) -> HTTPException:
+    """Backpressure response telling the client when to retry."""
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+
+@router.post("/search_vector_documents")
+async def search_vector_documents(request: QueryRequest):
+    try:
+        # Off the event loop: scheduler waits block the calling thread
+        return await asyncio.to_thread(
+            run_conversation_turn,
+            request.query,
+            request.session_id,
+            None,
+            Priority.INTERACTIVE,
+            request.fields,
+        )
+    except SchedulerOverloaded as e:
+        raise overloaded_error(e)
+
+
+@router.post("/search_vector_documents/batch")
+async def search_vector_documents_batch(request: BatchQueryRequest):
+    """
+    Runs many queries through the graph with bounded concurrency and streams
+    each result back as one NDJSON line as soon as it finishes.
+    Queries sharing a session id run in order, since they share a thread.
+    """
+    shared_retrieval = SharedRetrieval()
+    semaphore = asyncio.Semaphore(request.max_concurrency)
+    # Batch turns wait for scheduler slots on their own threads, so they can
+    # never fill the default executor that interactive requests go through
+    executor = ThreadPoolExecutor(
+        max_workers=request.max_concurrency, thread_name_prefix="batch"
+    )
+    results: asyncio.Queue = asyncio.Queue()
+
+    # Group by session so turns of the same conversation never race
+    sessions = {}
+    for index, item in enumerate(request.queries):
+        key = item.session_id or f"__new__{index}"
+        sessions.setdefault(key, []).append((index, item))
+
+    async def run_session(items):
+        for index, item in items:
+            async with semaphore:
+                try:
+                    response = await asyncio.get_running_loop().run_in_executor(
+                        executor,
+                        functools.partial(
+                            run_conversation_turn,
+                            item.query,
+                            item.session_id,
+                            shared_retrieval,
+                            Priority.BATCH,
+                            item.fields,
+                        ),
+                    )
+                    response["index"] = index
+                except SchedulerOverloaded as e:
+                    response = {
+                        "index": index,
+                        "session_id": item.session_id,
+                        "error": str(e),
+                        "retry_after": e.retry_after,
+                    }
+                except Exception as e:
+                    print(f"Batch query {index} failed: {e}")
+                    response = {
+                        "index": index,
+                        "session_id": item.session_id,
+                        "error": str(e),
+                    }
+            await results.put(response)
+
+    async def stream_results():
+        tasks = [asyncio.create_task(run_session(items)) for items in sessions.values()]
+        try:
+            for _ in range(len(request.queries)):
+                response = await results.get()
+                yield json.dumps(response, default=str) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
 
 
 CHROMA_DB_PATH = "chroma_vector_db"
@@ -68,6 +235,12 @@ def archive_incident_feedback(request: IncidentFeedbackRequest):
     metadata = {
         "type": "feedback",
         "feedback_timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        # Used by compaction to group feedback about the same incidents/query
+        "user_query": request.user_query,
+        "feedback": request.feedback,
+        "incident_numbers": find_incident_numbers(request.user_query, request.feedback),
+        "query_key": normalize_query(request.user_query),
+        "feedback_count": 1,
     }
 
     # 3. Create the LangChain Document
@@ -75,16 +248,18 @@ def archive_incident_feedback(request: IncidentFeedbackRequest):
 
     # 4. Load, update, and save the vector database
     print("Loading existing vector database to add incident feedback...")
-    vector_store = load_vector_db(CHROMA_DB_PATH)
+    vector_store = load_vector_db(CHROMA_DB_PATH, FEEDBACK_COLLECTION_NAME)
     if vector_store is None:
         raise FileNotFoundError(
             "Could not load the vector database. Ensure it has been created."
         )
 
     print("Adding new incident feedback document...")
-    vector_store.add_documents([feedback_document], ids=[str(uuid.uuid4())])
+    with request_priority(Priority.FEEDBACK):
+        vector_store.add_documents([feedback_document], ids=[str(uuid.uuid4())])
 
     vector_store.persist()
+    bump_collection_version(FEEDBACK_COLLECTION)
 
     print("Incident feedback document successfully processed and stored.")
 
@@ -100,6 +275,8 @@ def submit_incident_feedback(request: IncidentFeedbackRequest):
             "status": "success",
             "message": "Incident feedback has been successfully archived. Thank you!",
         }
+    except SchedulerOverloaded as e:
+        raise overloaded_error(e)
     except FileNotFoundError as e:
         # Handle cases where the vector DB doesn't exist
         raise HTTPException(status_code=500, detail=str(e))
@@ -110,3 +287,29 @@ def submit_incident_feedback(request: IncidentFeedbackRequest):
             status_code=500,
             detail="An internal error occurred while archiving the feedback.",
         )
+
+
+@router.post("/incident_feedback/compact")
+def compact_incident_feedback():
+    """
+    Merges near-duplicate feedback and applies the retention limits now,
+    instead of waiting for the periodic background run.
+    """
+    stats = compact_feedback(CHROMA_DB_PATH)
+    if not stats:
+        raise HTTPException(
+            status_code=500, detail="Could not load the vector database."
+        )
+    return {"status": "success", **stats}
+
+
+@router.get("/metrics/scheduler")
+def get_scheduler_metrics():
+    """Queue depth, in-flight calls and queue wait times per Ollama model."""
+    return scheduler_metrics()
+
+
+@router.get("/metrics/retrieval_cache")
+def get_retrieval_cache_metrics():
+    """Hit rate and size of the retrieval cache, and the collection versions."""
+    return retrieval_cache.metrics()
@@ -0,0 +1,310 @@
+"""
+Change-feed ingestion worker.
+
+Tails CHANGE_FEED_PATH, either one append-only JSONL/CSV file or a directory
+of JSONL/CSV drops, and upserts the changed tickets into the ticket store and
+the live vector store in micro-batches. Read offsets are saved after every
+successful flush, so a restarted worker resumes exactly where it stopped.
+A full ingestion replaces every ticket, so after one the feed is replayed
+from the start on top of it.
+
+    python -m app.change_feed
+"""
+
+import csv
+import io
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config import (
+    CHANGE_FEED_BATCH_SIZE,
+    CHANGE_FEED_MAX_LAG_SECONDS,
+    CHANGE_FEED_MAX_RETRIES,
+    CHANGE_FEED_OFFSETS_PATH,
+    CHANGE_FEED_PATH,
+    CHANGE_FEED_POLL_SECONDS,
+    CHANGE_FEED_REJECTS_PATH,
+    INGESTION_MODE,
+)
+from app.ingestion import load_manifest
+from app.scheduler import Priority, request_priority
+from app.services import (
+    CHROMA_DB_PATH,
+    create_and_save_vector_db,
+    create_document_from_row,
+    create_field_chunks,
+    slim_document,
+)
+from app.ticket_store import TICKET_FIELDS, get_tickets, save_tickets
+
+FEED_EXTENSIONS = (".jsonl", ".csv")
+
+# What is read from one feed file per poll, unless a single line or record
+# is longer; then reading goes on until it is complete
+READ_CHUNK_BYTES = 1 << 20
+
+# The csv module rejects fields over 128 KiB by default; long work notes are fine
+csv.field_size_limit(2**31 - 1)
+
+
+def load_offsets(
+    offsets_path: str = CHANGE_FEED_OFFSETS_PATH,
+) -> Tuple[Optional[str], Dict[str, int]]:
+    """The full ingestion the offsets were applied on top of, and the offsets."""
+    try:
+        with open(offsets_path) as f:
+            saved = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    return saved.get("ingested_at_utc"), saved.get("files", {})
+
+
+def save_offsets(
+    ingested_at: Optional[str],
+    offsets: Dict[str, int],
+    offsets_path: str = CHANGE_FEED_OFFSETS_PATH,
+):
+    tmp_path = offsets_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"ingested_at_utc": ingested_at, "files": offsets}, f, indent=2)
+    os.replace(tmp_path, offsets_path)
+
+
+def feed_files(feed_path: str) -> List[str]:
+    """The feed file itself, or the directory's drops in name order."""
+    if os.path.isdir(feed_path):
+        return [
+            os.path.join(feed_path, name)
+            for name in sorted(os.listdir(feed_path))
+            if name.endswith(FEED_EXTENSIONS)
+        ]
+    return [feed_path] if os.path.exists(feed_path) else []
+
+
+def read_new_rows(path: str, offset: int) -> Tuple[List[dict], int]:
+    """
+    Reads the complete lines (CSV: records) appended to `path` after byte
+    `offset` and returns them as rows along with the offset to resume from.
+    A partially written last line or record is left for the next read.
+    """
+    with open(path, "rb") as f:
+        header = None
+        if path.endswith(".csv"):
+            header_line = f.readline()
+            if not header_line.endswith(b"\n"):
+                return [], offset
+            header = next(csv.reader([header_line.decode("utf-8")]))
+            offset = max(offset, len(header_line))
+
+        if os.fstat(f.fileno()).st_size < offset:
+            print(f"{path} was truncated; reading it from the start.")
+            offset = len(header_line) if header else 0
+        f.seek(offset)
+        data = b""
+        while True:
+            chunk = f.read(READ_CHUNK_BYTES)
+            data += chunk
+            complete = data[: data.rfind(b"\n") + 1]
+            if header:
+                complete = _complete_csv_records(complete)
+            if complete or len(chunk) < READ_CHUNK_BYTES:
+                break
+
+    if header:
+        # One reader over the whole block, so quoted newlines stay in their value
+        reader = csv.DictReader(
+            io.StringIO(complete.decode("utf-8")), fieldnames=header
+        )
+        return list(reader), offset + len(complete)
+
+    rows = []
+    for line in complete.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            print(f"Skipping malformed change-feed line in {path}: {line[:80]}")
+            continue
+        rows.append(row)
+    return rows, offset + len(complete)
+
+
+def _complete_csv_records(data: bytes) -> bytes:
+    """
+    The leading part of `data` made of whole CSV records. A line only ends a
+    record when the quotes so far are balanced, so quoted values spanning
+    several lines are never cut apart.
+    """
+    end = position = quotes = 0
+    for line in data.splitlines(keepends=True):
+        position += len(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            end = position
+    return data[:end]
+
+
+def apply_ticket_changes(rows: List[dict], vector_db_path: str = CHROMA_DB_PATH) -> int:
+    """
+    Merges the changed fields into the stored tickets, normalizes them with
+    the same rules as the Excel ingestion and replaces their entries in the
+    vector store. Changed tickets leave their near-duplicate cluster and are
+    indexed on their own. Returns the number of tickets updated.
+    """
+    changes: Dict[str, dict] = {}
+    for row in rows:
+        incident_number = str(row.get("incident_number") or "").strip().lower()
+        if not incident_number:
+            print(f"Skipping change without incident_number: {row}")
+            continue
+        changes.setdefault(incident_number, {}).update(
+            {
+                field: "nan" if value is None else value
+                for field, value in row.items()
+                if field in TICKET_FIELDS
+            }
+        )
+    if not changes:
+        return 0
+
+    existing = get_tickets(list(changes))
+    documents = []
+    for incident_number, change in changes.items():
+        ticket = {field: "nan" for field in TICKET_FIELDS}
+        ticket.update(existing.get(incident_number, {}))
+        ticket.update(change, incident_number=incident_number)
+        documents.append(create_document_from_row(ticket, 0))
+
+    save_tickets([doc.metadata for doc in documents])
+
+    if INGESTION_MODE == "field_chunks":
+        indexed = create_field_chunks(documents)
+    else:
+        indexed = [slim_document(doc) for doc in documents]
+    vector_store = create_and_save_vector_db(
+        indexed, vector_db_path, incident_numbers=list(changes)
+    )
+    if vector_store is None:
+        raise RuntimeError("Vector store update failed")
+
+    print(f"Change feed applied updates to {len(changes)} tickets")
+    return len(changes)
+
+
+def apply_rows_one_by_one(
+    rows: List[dict], rejects_path: str = CHANGE_FEED_REJECTS_PATH
+) -> int:
+    """
+    Applies `rows` one at a time so a single bad row cannot hold back the
+    rest. Rows that still fail are appended to `rejects_path`. Returns the
+    number of rejected rows.
+    """
+    rejected = 0
+    for row in rows:
+        try:
+            with request_priority(Priority.BATCH):
+                apply_ticket_changes([row])
+        except Exception as e:
+            print(f"Rejecting change-feed row to {rejects_path}: {e}")
+            with open(rejects_path, "a") as f:
+                f.write(json.dumps(row, default=str) + "\n")
+            rejected += 1
+    return rejected
+
+
+def run_change_feed(
+    feed_path: str = CHANGE_FEED_PATH,
+    offsets_path: str = CHANGE_FEED_OFFSETS_PATH,
+    stop_event: Optional[threading.Event] = None,
+    rejects_path: str = CHANGE_FEED_REJECTS_PATH,
+):
+    """
+    Polls the feed and flushes pending rows once CHANGE_FEED_BATCH_SIZE of
+    them are queued or the oldest has waited CHANGE_FEED_MAX_LAG_SECONDS.
+    Offsets only advance after a flush succeeds; a failed flush is retried,
+    and after CHANGE_FEED_MAX_RETRIES failures its rows are applied one by
+    one and the failing ones rejected.
+    """
+    ingested_at, offsets = load_offsets(offsets_path)
+    pending: List[dict] = []
+    pending_offsets: Dict[str, int] = {}
+    oldest_pending = None
+    failed_flushes = 0
+    print(f"Watching change feed at {feed_path}")
+
+    while not (stop_event and stop_event.is_set()):
+        # A full ingestion (here or in another process) overwrote the applied
+        # updates; start over so they are reapplied on top of it
+        latest_ingestion = (load_manifest() or {}).get("ingested_at_utc")
+        if latest_ingestion != ingested_at:
+            if offsets:
+                print("Tickets were re-ingested; replaying the change feed.")
+            ingested_at, offsets = latest_ingestion, {}
+            pending, pending_offsets, oldest_pending = [], {}, None
+            failed_flushes = 0
+            save_offsets(ingested_at, offsets, offsets_path)
+
+        for path in feed_files(feed_path):
+            key = os.path.abspath(path)
+            rows, offset = read_new_rows(
+                path, pending_offsets.get(key, offsets.get(key, 0))
+            )
+            pending_offsets[key] = offset
+            if rows:
+                pending.extend(rows)
+                oldest_pending = oldest_pending or time.monotonic()
+            if len(pending) >= CHANGE_FEED_BATCH_SIZE:
+                break
+
+        due = pending and (
+            len(pending) >= CHANGE_FEED_BATCH_SIZE
+            or time.monotonic() - oldest_pending >= CHANGE_FEED_MAX_LAG_SECONDS
+        )
+        if due:
+            try:
+                with request_priority(Priority.BATCH):
+                    apply_ticket_changes(pending)
+            except Exception as e:
+                failed_flushes += 1
+                if failed_flushes < CHANGE_FEED_MAX_RETRIES:
+                    print(f"Change-feed flush failed; retrying: {e}")
+                    time.sleep(CHANGE_FEED_POLL_SECONDS)
+                    continue
+                print(f"Change-feed flush failed {failed_flushes} times: {e}")
+                apply_rows_one_by_one(pending, rejects_path)
+            failed_flushes = 0
+            offsets.update(pending_offsets)
+            save_offsets(ingested_at, offsets, offsets_path)
+            pending, pending_offsets, oldest_pending = [], {}, None
+            # More may already be waiting in the feed
+            continue
+
+        if pending_offsets.items() - offsets.items() and not pending:
+            # Only blank or skipped lines were read; remember them
+            offsets.update(pending_offsets)
+            save_offsets(ingested_at, offsets, offsets_path)
+        time.sleep(CHANGE_FEED_POLL_SECONDS)
+
+
+def start_change_feed(feed_path: str = CHANGE_FEED_PATH) -> threading.Event:
+    """Runs `run_change_feed` in a daemon thread; set the returned event to stop it."""
+    stop_event = threading.Event()
+    threading.Thread(
+        target=run_change_feed,
+        kwargs={"feed_path": feed_path, "stop_event": stop_event},
+        name="change-feed",
+        daemon=True,
+    ).start()
+    return stop_event
+
+
+if __name__ == "__main__":
+    if not CHANGE_FEED_PATH:
+        raise SystemExit("Set CHANGE_FEED_PATH to a feed file or drop directory.")
+    run_change_feed()
@@ -6,4 +6,89 @@ load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(BASE_DIR)
-EXCEL_PATH = os.path.join(PROJECT_ROOT, "data", "Incident_tickets_sample.xlsx")
+EXCEL_PATH = os.path.join(PROJECT_ROOT, "data", "incident_tickets_sample.xlsx")
+
+# "ticket" embeds one document per ticket; "field_chunks" embeds compact
+# per-field chunks and assembles the matched fields of the parent at query time
+INGESTION_MODE = os.getenv("INGESTION_MODE", "ticket")
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "500"))
+
+# Live ticket updates: an append-only JSONL/CSV file or a directory of drops.
+# Empty disables the change feed; CHANGE_FEED_IN_APP runs it inside the API.
+CHANGE_FEED_PATH = os.getenv("CHANGE_FEED_PATH", "")
+CHANGE_FEED_IN_APP = os.getenv("CHANGE_FEED_IN_APP", "true").lower() == "true"
+CHANGE_FEED_OFFSETS_PATH = os.getenv(
+    "CHANGE_FEED_OFFSETS_PATH", "change_feed_offsets.json"
+)
+CHANGE_FEED_BATCH_SIZE = int(os.getenv("CHANGE_FEED_BATCH_SIZE", "50"))
+CHANGE_FEED_MAX_LAG_SECONDS = float(os.getenv("CHANGE_FEED_MAX_LAG_SECONDS", "2"))
+CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "0.5"))
+# After this many failed flushes in a row, rows are applied one at a time and
+# the ones that still fail are set aside as JSONL (drop it back in to replay)
+CHANGE_FEED_MAX_RETRIES = int(os.getenv("CHANGE_FEED_MAX_RETRIES", "5"))
+CHANGE_FEED_REJECTS_PATH = os.getenv(
+    "CHANGE_FEED_REJECTS_PATH", "change_feed_rejects.jsonl"
+)
+
+# Ticket vectors are sharded into one Chroma collection per "location",
+# "category" or "incident_hash" bucket; "none" keeps a single collection
+VECTOR_SHARD_KEY = os.getenv("VECTOR_SHARD_KEY", "none")
+VECTOR_SHARD_COUNT = int(os.getenv("VECTOR_SHARD_COUNT", "4"))
+VECTOR_SHARD_WORKERS = int(os.getenv("VECTOR_SHARD_WORKERS", "4"))
+# Threads shared by the shard searches of all concurrent requests
+VECTOR_SEARCH_THREADS = int(os.getenv("VECTOR_SEARCH_THREADS", "32"))
+
+# Collapse near-duplicate tickets (MinHash/LSH over title, description and
+# close notes) into one embedded representative per cluster
+DEDUP_NEAR_DUPLICATES = os.getenv("DEDUP_NEAR_DUPLICATES", "false").lower() == "true"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+
+# SQLite side store holding the full ticket records, fetched by incident number
+TICKET_STORE_PATH = os.getenv("TICKET_STORE_PATH", "ticket_store.sqlite3")
+
+# Ollama models
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gemma3:latest")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "embeddinggemma:latest")
+
+# Ollama hosts, comma separated. Embeddings default to the chat hosts.
+OLLAMA_CHAT_ENDPOINTS = [
+    url.strip()
+    for url in os.getenv("OLLAMA_CHAT_ENDPOINTS", "http://localhost:11434").split(",")
+    if url.strip()
+]
+OLLAMA_EMBED_ENDPOINTS = [
+    url.strip()
+    for url in os.getenv(
+        "OLLAMA_EMBED_ENDPOINTS", ",".join(OLLAMA_CHAT_ENDPOINTS)
+    ).split(",")
+    if url.strip()
+]
+# "least_loaded" or "round_robin"
+OLLAMA_ROUTING = os.getenv("OLLAMA_ROUTING", "least_loaded")
+# How long Ollama keeps a model in memory after the last call
+OLLAMA_KEEP_ALIVE_SECONDS = int(os.getenv("OLLAMA_KEEP_ALIVE_SECONDS", "1800"))
+OLLAMA_HEALTH_CHECK_SECONDS = float(os.getenv("OLLAMA_HEALTH_CHECK_SECONDS", "15"))
+
+# Admission control for Ollama-bound calls, per healthy host of the model's pool
+OLLAMA_MAX_CONCURRENCY = {
+    CHAT_MODEL: int(os.getenv("OLLAMA_CHAT_MAX_CONCURRENCY", "2")),
+    EMBEDDING_MODEL: int(os.getenv("OLLAMA_EMBED_MAX_CONCURRENCY", "4")),
+}
+OLLAMA_QUEUE_DEADLINE_SECONDS = float(os.getenv("OLLAMA_QUEUE_DEADLINE_SECONDS", "30"))
+
+# Entries in the in-memory retrieval cache; 0 disables it
+RETRIEVAL_CACHE_SIZE = int(os.getenv("RETRIEVAL_CACHE_SIZE", "512"))
+
+# Local pre-verifier: answers scoring at least this skip the LLM verifier
+PRE_VERIFIER_ENABLED = os.getenv("PRE_VERIFIER_ENABLED", "true").lower() == "true"
+PRE_VERIFIER_PASS_SCORE = float(os.getenv("PRE_VERIFIER_PASS_SCORE", "0.75"))
+
+# Feedback compaction
+FEEDBACK_COMPACTION_SECONDS = float(os.getenv("FEEDBACK_COMPACTION_SECONDS", "3600"))
+FEEDBACK_MERGE_SIMILARITY = float(os.getenv("FEEDBACK_MERGE_SIMILARITY", "0.9"))
+FEEDBACK_RETENTION_DAYS = int(os.getenv("FEEDBACK_RETENTION_DAYS", "180"))
+FEEDBACK_MAX_PER_GROUP = int(os.getenv("FEEDBACK_MAX_PER_GROUP", "3"))
+FEEDBACK_MAX_DOCUMENTS = int(os.getenv("FEEDBACK_MAX_DOCUMENTS", "1000"))
+FEEDBACK_MAX_STATEMENTS = int(os.getenv("FEEDBACK_MAX_STATEMENTS", "5"))
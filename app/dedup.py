@@ -0,0 +1,137 @@
+import hashlib
+import re
+from typing import Dict, List, Set, Tuple
+
+from langchain.schema import Document
+
+from app.config import DEDUP_BANDS, DEDUP_NUM_PERM, DEDUP_THRESHOLD
+
+# Fields compared when looking for near-duplicate tickets
+DEDUP_FIELDS = ["title", "description", "close_notes"]
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def normalize_ticket_text(ticket: dict) -> str:
+    """Lowercased title, description and close notes, reduced to plain words."""
+    text = " ".join(str(ticket.get(field, "")) for field in DEDUP_FIELDS)
+    text = re.sub(r"\bnan\b", " ", text.lower())
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """Word n-grams of `text`; short texts fall back to their words."""
+    words = text.split()
+    if len(words) < size:
+        return set(words)
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures using universal hashing over a 64-bit shingle hash."""
+
+    def __init__(self, num_perm: int = DEDUP_NUM_PERM, seed: int = 1):
+        # Deterministic coefficients so signatures are stable across runs
+        coefficients = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}-{i}".encode(), digest_size=16).digest()
+            a = int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+            b = int.from_bytes(digest[8:], "big") % _MERSENNE_PRIME
+            coefficients.append((a, b))
+        self.coefficients = coefficients
+
+    def signature(self, shingle_set: Set[str]) -> Tuple[int, ...]:
+        if not shingle_set:
+            return tuple(_MERSENNE_PRIME for _ in self.coefficients)
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+            for s in shingle_set
+        ]
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self.coefficients
+        )
+
+
+def estimated_jaccard(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def find_near_duplicate_clusters(
+    tickets: List[dict],
+    threshold: float = DEDUP_THRESHOLD,
+    bands: int = DEDUP_BANDS,
+) -> List[List[int]]:
+    """
+    Clusters tickets whose normalized text has an estimated Jaccard similarity
+    of at least `threshold`. LSH banding proposes candidate pairs so only
+    tickets sharing a band bucket are compared. Returns lists of indexes.
+    """
+    hasher = MinHasher()
+    shingle_sets = [shingles(normalize_ticket_text(ticket)) for ticket in tickets]
+    signatures = [hasher.signature(shingle_set) for shingle_set in shingle_sets]
+    rows = len(hasher.coefficients) // bands
+
+    parent = list(range(len(tickets)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets: Dict[tuple, List[int]] = {}
+        for i, signature in enumerate(signatures):
+            # Tickets without any text never count as duplicates
+            if shingle_sets[i]:
+                key = signature[band * rows : (band + 1) * rows]
+                buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            for position, i in enumerate(members):
+                for j in members[position + 1 :]:
+                    first, second = find(i), find(j)
+                    if first != second and (
+                        estimated_jaccard(signatures[i], signatures[j]) >= threshold
+                    ):
+                        parent[second] = first
+
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(tickets)):
+        clusters.setdefault(find(i), []).append(i)
+    return list(clusters.values())
+
+
+def collapse_near_duplicates(documents: List[Document]) -> List[Document]:
+    """
+    Keeps one representative document per near-duplicate cluster, the one
+    with the most content. Each ticket's metadata gets a `representative`
+    incident number, and representatives list their duplicates in both
+    metadata and content.
+    """
+    clusters = find_near_duplicate_clusters([doc.metadata for doc in documents])
+
+    representatives = []
+    for cluster in clusters:
+        members = [documents[i] for i in cluster]
+        representative = max(members, key=lambda doc: len(doc.page_content))
+        rep_number = representative.metadata["incident_number"]
+        for member in members:
+            member.metadata["representative"] = rep_number
+
+        duplicates = [
+            m.metadata["incident_number"] for m in members if m is not representative
+        ]
+        if duplicates:
+            representative.metadata["duplicate_incident_numbers"] = ",".join(duplicates)
+            representative.page_content += (
+                f"HAS_DUPLICATES: For incident number:{rep_number} -> "
+                f"Also reported as: {', '.join(duplicates)}\n"
+            )
+        representatives.append(representative)
+
+    print(
+        f"Collapsed {len(documents)} tickets into {len(representatives)} "
+        f"near-duplicate clusters"
+    )
+    return representatives
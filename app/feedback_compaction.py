@@ -0,0 +1,225 @@
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from langchain.schema import Document
+
+from app.config import (
+    FEEDBACK_MAX_DOCUMENTS,
+    FEEDBACK_MAX_PER_GROUP,
+    FEEDBACK_MAX_STATEMENTS,
+    FEEDBACK_MERGE_SIMILARITY,
+    FEEDBACK_RETENTION_DAYS,
+)
+from app.retrieval_cache import (
+    FEEDBACK_COLLECTION,
+    bump_collection_version,
+    normalize_query,
+)
+from app.scheduler import Priority, request_priority
+from app.services import CHROMA_DB_PATH, FEEDBACK_COLLECTION_NAME, load_vector_db
+from app.text_matching import INCIDENT_NUMBER_PATTERN, cosine_similarity
+
+LEGACY_QUERY_PATTERN = re.compile(r"User's Query: '(.*?)'\. Provided Content:", re.S)
+LEGACY_FEEDBACK_PATTERN = re.compile(r"User's Feedback: '(.*?)'\.$", re.S)
+
+_compaction_lock = threading.Lock()
+
+
+def find_incident_numbers(*texts: str) -> str:
+    """Sorted, comma-joined incident numbers mentioned in `texts`."""
+    numbers = set()
+    for text in texts:
+        numbers.update(n.lower() for n in INCIDENT_NUMBER_PATTERN.findall(text or ""))
+    return ",".join(sorted(numbers))
+
+
+def _feedback_fields(content: str, metadata: dict) -> dict:
+    """Grouping fields of a feedback entry, recovered from the text for old entries."""
+    user_query = metadata.get("user_query")
+    feedback = metadata.get("feedback")
+    if user_query is None:
+        match = LEGACY_QUERY_PATTERN.search(content)
+        user_query = match.group(1) if match else content
+    if feedback is None:
+        match = LEGACY_FEEDBACK_PATTERN.search(content)
+        feedback = match.group(1) if match else content
+
+    # Not taken from the rated answer: it may mention unrelated incidents, which
+    # would keep near-identical feedback in different groups
+    incident_numbers = find_incident_numbers(user_query, feedback)
+
+    timestamp = metadata.get("feedback_timestamp_utc") or "1970-01-01T00:00:00+00:00"
+    return {
+        "user_query": user_query,
+        "feedback": feedback,
+        "incident_numbers": incident_numbers,
+        "query_key": metadata.get("query_key") or normalize_query(user_query),
+        "feedback_count": int(metadata.get("feedback_count", 1)),
+        "feedback_timestamp_utc": timestamp,
+        "first_feedback_timestamp_utc": metadata.get(
+            "first_feedback_timestamp_utc", timestamp
+        ),
+    }
+
+
+def _cluster(entries: List[dict], threshold: float) -> List[List[dict]]:
+    """Greedy near-duplicate clustering against each cluster's first entry."""
+    clusters = []
+    for entry in entries:
+        for cluster in clusters:
+            if (
+                cosine_similarity(cluster[0]["embedding"], entry["embedding"])
+                >= threshold
+            ):
+                cluster.append(entry)
+                break
+        else:
+            clusters.append([entry])
+    return clusters
+
+
+def _consolidate(cluster: List[dict]) -> Document:
+    """Merges a cluster of near-duplicate feedback into one document."""
+    statements = []
+    for entry in cluster:
+        for statement in entry["feedback"].split("\n- "):
+            statement = statement.strip().lstrip("- ")
+            if statement and normalize_query(statement) not in {
+                normalize_query(s) for s in statements
+            }:
+                statements.append(statement)
+    statements = statements[:FEEDBACK_MAX_STATEMENTS]
+
+    newest = cluster[0]
+    feedback_count = sum(entry["feedback_count"] for entry in cluster)
+    page_content = (
+        f"Consolidated user feedback on an incident query "
+        f"({feedback_count} reports). "
+        f"User's Query: '{newest['user_query']}'. "
+        f"User's Feedback: " + " ".join(f"'{s}'." for s in statements)
+    )
+    metadata = {
+        "type": "feedback",
+        "user_query": newest["user_query"],
+        "feedback": "\n- ".join(statements),
+        "incident_numbers": newest["incident_numbers"],
+        "query_key": newest["query_key"],
+        "feedback_count": feedback_count,
+        "feedback_timestamp_utc": newest["feedback_timestamp_utc"],
+        "first_feedback_timestamp_utc": min(
+            entry["first_feedback_timestamp_utc"] for entry in cluster
+        ),
+        "consolidated": True,
+    }
+    return Document(page_content=page_content, metadata=metadata)
+
+
+def compact_feedback(vector_db_path: str = CHROMA_DB_PATH) -> Dict[str, int]:
+    """
+    Groups feedback by the incidents (or, failing that, the query) it refers
+    to, merges near-duplicates within each group into consolidated documents,
+    applies the retention limits and replaces the originals in the index.
+    """
+    with _compaction_lock:
+        vector_store = load_vector_db(vector_db_path, FEEDBACK_COLLECTION_NAME)
+        if vector_store is None:
+            return {}
+
+        stored = vector_store.get(
+            where={"type": "feedback"},
+            include=["documents", "metadatas", "embeddings"],
+        )
+        entries = [
+            {"id": id_, "embedding": list(embedding), **_feedback_fields(doc, meta)}
+            for id_, doc, meta, embedding in zip(
+                stored["ids"],
+                stored["documents"],
+                stored["metadatas"],
+                stored["embeddings"],
+            )
+        ]
+        # Newest first, so retention keeps the most recent feedback
+        entries.sort(key=lambda e: e["feedback_timestamp_utc"], reverse=True)
+
+        cutoff = (
+            datetime.now(timezone.utc) - timedelta(days=FEEDBACK_RETENTION_DAYS)
+        ).isoformat()
+        expired = [e for e in entries if e["feedback_timestamp_utc"] < cutoff]
+        entries = [e for e in entries if e["feedback_timestamp_utc"] >= cutoff]
+
+        groups: Dict[str, List[dict]] = {}
+        for entry in entries:
+            key = entry["incident_numbers"] or entry["query_key"]
+            groups.setdefault(key, []).append(entry)
+
+        kept, merged, new_documents = [], [], []
+        for group in groups.values():
+            clusters = _cluster(group, FEEDBACK_MERGE_SIMILARITY)
+            for cluster in clusters[:FEEDBACK_MAX_PER_GROUP]:
+                if len(cluster) == 1:
+                    kept.append(cluster[0])
+                else:
+                    merged.extend(cluster)
+                    new_documents.append(
+                        (cluster[0]["feedback_timestamp_utc"], _consolidate(cluster))
+                    )
+            for cluster in clusters[FEEDBACK_MAX_PER_GROUP:]:
+                expired.extend(cluster)
+
+        # Enforce the overall cap across kept and consolidated feedback
+        survivors = sorted(
+            [(e["feedback_timestamp_utc"], e) for e in kept] + new_documents,
+            key=lambda item: item[0],
+            reverse=True,
+        )
+        new_documents = [
+            item
+            for item in survivors[:FEEDBACK_MAX_DOCUMENTS]
+            if isinstance(item[1], Document)
+        ]
+        expired.extend(
+            item
+            for _, item in survivors[FEEDBACK_MAX_DOCUMENTS:]
+            if not isinstance(item, Document)
+        )
+
+        if new_documents:
+            with request_priority(Priority.FEEDBACK):
+                vector_store.add_documents(
+                    [document for _, document in new_documents],
+                    ids=[str(uuid.uuid4()) for _ in new_documents],
+                )
+
+        removed_ids = [e["id"] for e in merged + expired]
+        if removed_ids:
+            vector_store.delete(ids=removed_ids)
+        if new_documents or removed_ids:
+            bump_collection_version(FEEDBACK_COLLECTION)
+
+        stats = {
+            "scanned": len(stored["ids"]),
+            "merged": len(merged),
+            "consolidated": len(new_documents),
+            "expired": len(expired),
+            "remaining": len(stored["ids"]) - len(removed_ids) + len(new_documents),
+        }
+        print(f"Feedback compaction finished: {stats}")
+        return stats
+
+
+def start_feedback_compaction(interval_seconds: float):
+    """Runs `compact_feedback` periodically in a daemon thread."""
+
+    def loop():
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                compact_feedback()
+            except Exception as e:
+                print(f"Feedback compaction failed: {e}")
+
+    threading.Thread(target=loop, name="feedback-compaction", daemon=True).start()
@@ -10,12 +10,13 @@ from langchain_core.prompts import (
 )
 from datetime import datetime
 
-from .schemas import AnswerQuestion, VerificationModel
+from .schemas import AnalyticsQuery, AnswerQuestion, VerificationModel
 from llms import llm
 
 
 parser = JsonOutputParser(pydantic_object=AnswerQuestion)
 verification_parser = JsonOutputParser(pydantic_object=VerificationModel)
+analytics_parser = JsonOutputParser(pydantic_object=AnalyticsQuery)
 
 boolean_parser = BooleanOutputParser(true_val="YES", false_val="NO")
 
@@ -66,7 +67,7 @@ first_responder_prompt = ChatPromptTemplate.from_template(
         *   Is it a **direct user question**?
         *   Or is it a **system-generated reflection** asking for improvements on a previous answer?
 
-        Next, based on this analysis, you MUST classify the required action into one of three categories: `HISTORIC`, `NEEDS_SEARCH`, or `CASUAL`.
+        Next, based on this analysis, you MUST classify the required action into one of four categories: `HISTORIC`, `NEEDS_SEARCH`, `ANALYTICS`, or `CASUAL`.
 
         **Classification Rules:**
 
@@ -85,6 +86,10 @@ first_responder_prompt = ChatPromptTemplate.from_template(
             *   Choose this if the 'Current Query' is a **direct user question** that is a simple greeting, thank-you, or conversational filler.
             *   **Example User Query:** "Thanks for the help!"
 
+        4.  **`ANALYTICS`**:
+            *   Choose this if the 'Current Query' is a **direct user question** asking for an aggregate over many tickets: how many, average time, breakdown by team/priority/state, or a list of tickets matching criteria.
+            *   **Example User Query:** "How many P1 incidents did network-ops close last week?"
+
 
         ---
         **Inputs for Analysis:**
@@ -183,3 +188,33 @@ verification_prompt = PromptTemplate(
 )
 
 verifier_chain = verification_prompt | llm | verification_parser
+
+
+# ANALYTICS WORKFLOW CHAIN___________________________________________
+analytics_prompt = PromptTemplate(
+    template="""You are an expert at turning questions about incident tickets into structured aggregate queries.
+
+    The tickets table has these columns: incident_number, title, priority (low, medium, high, critical),
+    state (open, in progress, resolved, closed), assignment_group, category, location, caller,
+    assigned_to, updated_by, created, updated, resolved_time.
+
+    **Rules:**
+    - Map priority codes: P1 = critical, P2 = high, P3 = medium, P4 = low.
+    - "Closed" or "resolved" questions filter state on both values and use resolved_time as the date_field.
+    - Relative periods become within_days (last week = 7, last month = 30). Today's date is {today}.
+    - Use lowercase filter values and only the allowed columns.
+
+    User Query: {query}
+
+    **Output Instructions:**
+    Provide a valid JSON object following this format:
+    {format_instructions}
+    """,
+    input_variables=["query"],
+    partial_variables={
+        "format_instructions": analytics_parser.get_format_instructions(),
+        "today": lambda: datetime.now().strftime("%Y-%m-%d"),
+    },
+)
+
+analytics_chain = analytics_prompt | llm | analytics_parser
@@ -6,10 +6,16 @@ from .chains import (
     history_aware_chain,
     verifier_chain,
     is_follow_up_chain,
+    analytics_chain,
 )
+from app.analytics import format_table, run_analytics_query
 from .tool_executor import run_queries, run_query_feedback
+from .pre_verifier import pre_verify
+from langchain_core.exceptions import OutputParserException
 from langchain_core.messages import AIMessage, HumanMessage
-from .schemas import QueryType
+from langchain_core.runnables import RunnableConfig
+from pydantic import ValidationError
+from .schemas import AnalyticsQuery, QueryType
 
 
 def check_for_followup(state: GraphState):
@@ -65,15 +71,18 @@ def generate_historic_answer(state: GraphState):
     return {"messages": [AIMessage(content=response)], "metadata": []}
 
 
-def run_tool_node(state: GraphState):
+def run_tool_node(state: GraphState, config: RunnableConfig):
     print("---RUNNING TOOLS---")
     ia = state.get("initial_answer", {}) or {}
     search_queries = list(ia.get("search_queries", []) or [])
     search_numbers = ia.get("list_of_incident_numbers", []) or []
 
-    nested_references = run_queries(search_queries, search_numbers)
+    # Set by the batch endpoint so overlapping queries share their searches
+    shared = config.get("configurable", {}).get("shared_retrieval")
 
-    nested_feedacks = run_query_feedback(search_queries)
+    nested_references = run_queries(search_queries, search_numbers, shared=shared)
+
+    nested_feedacks = run_query_feedback(search_queries, shared=shared)
 
     print(f"references {nested_references}")
 
@@ -94,6 +103,27 @@ def run_tool_node(state: GraphState):
     }
 
 
+def run_analytics_node(state: GraphState):
+    """Answers aggregate questions with a SQL query over the tickets table."""
+    print("---RUNNING ANALYTICS---")
+    try:
+        reply = analytics_chain.invoke({"query": state["query"]})
+        spec = AnalyticsQuery.model_validate(reply).model_dump(mode="json")
+    except (OutputParserException, ValidationError) as e:
+        print(f"Invalid analytics spec: {e}")
+        return {
+            "references": "Could not build an aggregate query for this question.\n",
+            "metadata": [],
+        }
+    print(f"analytics spec {spec}")
+    rows = run_analytics_query(spec)
+    return {
+        "references": f"Aggregate query result over the incident tickets:\n"
+        f"{format_table(rows)}\n",
+        "metadata": [],
+    }
+
+
 def final_answer(state: GraphState):
     """Finalizes the answer based on the retrieved references."""
     print("---FINALIZING ANSWER---")
@@ -115,7 +145,20 @@ def quality_gate_node(state: GraphState):
     query = state["query"]
     answer = state["answer"]
 
-    verification_result = verifier_chain.invoke({"query": query, "answer": answer})
+    ia = state.get("initial_answer", {}) or {}
+    pre_verification = pre_verify(
+        query,
+        answer,
+        state.get("references", ""),
+        ia.get("list_of_incident_numbers", []) or [],
+    )
+    print(f"---PRE-VERIFIER--- {pre_verification}")
+
+    if pre_verification["confident_pass"]:
+        # Clearly grounded answers don't need the LLM verifier
+        verification_result = {"is_sufficient": True, "reflection": ""}
+    else:
+        verification_result = verifier_chain.invoke({"query": query, "answer": answer})
 
     if verification_result["is_sufficient"]:
         print(
@@ -158,3 +201,6 @@ def should_continue(state: GraphState):
     elif state["initial_answer"]["query_type"] == QueryType.HISTORICAL:
         print("---DECISION: HISTORIC---")
         return "historic"
+    elif state["initial_answer"]["query_type"] == QueryType.ANALYTICS:
+        print("---DECISION: ANALYTICS---")
+        return "analytics"
@@ -0,0 +1,92 @@
+import re
+from typing import List
+
+from app.config import PRE_VERIFIER_ENABLED, PRE_VERIFIER_PASS_SCORE
+from app.text_matching import INCIDENT_NUMBER_PATTERN, cosine_similarity
+from llms import embeddings
+
+STOP_WORDS = set("""
+    about after all also and any are can could did does for from give had has
+    have how incident incidents into its like more please show tell than that
+    the their them then there these this ticket tickets was were what when where
+    which who why will with would you your
+    """.split())
+
+# Only this much of the references is embedded for the similarity check
+MAX_REFERENCE_CHARS = 4000
+
+
+def content_words(text: str) -> List[str]:
+    """Lowercased words of `text` without stop words, numbers or short tokens."""
+    words = re.findall(r"[a-z][a-z0-9_-]+", (text or "").lower())
+    return [w for w in words if len(w) > 2 and w not in STOP_WORDS]
+
+
+def _coverage(required, text: str) -> float:
+    """Share of `required` terms found in `text`; nothing required is full coverage."""
+    required = set(required)
+    if not required:
+        return 1.0
+    text = text.lower()
+    return sum(1 for term in required if term in text) / len(required)
+
+
+def pre_verify(
+    query: str, answer: str, references: str, incident_numbers: List[str] = ()
+) -> dict:
+    """
+    Cheap local check of an answer before the LLM verifier. Scores how well
+    the answer covers the query's incident numbers and key terms, and how
+    grounded it is in the references, lexically and by embedding similarity.
+    `confident_pass` is only set when every incident number is covered and
+    the weighted score reaches PRE_VERIFIER_PASS_SCORE.
+    """
+    numbers = {n.lower() for n in incident_numbers}
+    numbers.update(n.lower() for n in INCIDENT_NUMBER_PATTERN.findall(query or ""))
+    # Whole incident numbers only: inc100 is not covered by inc1000
+    answer_numbers = {n.lower() for n in INCIDENT_NUMBER_PATTERN.findall(answer or "")}
+
+    scores = {
+        "incident_coverage": (
+            len(numbers & answer_numbers) / len(numbers) if numbers else 1.0
+        ),
+        "term_coverage": _coverage(content_words(query), answer or ""),
+        "lexical_grounding": 0.0,
+        "embedding_similarity": 0.0,
+        "score": 0.0,
+        "confident_pass": False,
+    }
+
+    answer_words = set(content_words(answer))
+    if not PRE_VERIFIER_ENABLED or not references or not answer_words:
+        return scores
+
+    reference_words = set(content_words(references))
+    scores["lexical_grounding"] = len(answer_words & reference_words) / len(
+        answer_words
+    )
+
+    # Missing incidents always go to the LLM verifier; skip the embedding call
+    if scores["incident_coverage"] < 1.0:
+        return scores
+
+    try:
+        answer_vector, reference_vector = embeddings.embed_documents(
+            [answer, references[:MAX_REFERENCE_CHARS]]
+        )
+    except Exception as e:
+        # E.g. SchedulerOverloaded or an unreachable host: no shortcut
+        print(f"Pre-verifier embedding failed; deferring to the LLM verifier: {e}")
+        return scores
+    scores["embedding_similarity"] = max(
+        0.0, cosine_similarity(answer_vector, reference_vector)
+    )
+
+    scores["score"] = round(
+        0.3 * scores["term_coverage"]
+        + 0.35 * scores["lexical_grounding"]
+        + 0.35 * scores["embedding_similarity"],
+        3,
+    )
+    scores["confident_pass"] = scores["score"] >= PRE_VERIFIER_PASS_SCORE
+    return scores
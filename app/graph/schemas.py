@@ -1,6 +1,6 @@
-from typing import List
+from typing import Dict, List, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from enum import Enum
 
 
@@ -10,6 +10,7 @@ class QueryType(str, Enum):
     CASUAL = "casual"
     HISTORICAL = "historic"
     NEEDS_SEARCH = "needs_search"
+    ANALYTICS = "analytics"
 
 
 class AnswerQuestion(BaseModel):
@@ -21,7 +22,9 @@ class AnswerQuestion(BaseModel):
         ...,
         description=(
             "Categorize the user's query. Use 'casual' for greetings/chit-chat, "
-            "'historic' if the answer is in the chat history, and "
+            "'historic' if the answer is in the chat history, "
+            "'analytics' for aggregate questions over many tickets (counts, "
+            "averages, breakdowns), and "
             "'needs_search' if a new search is required."
         ),
     )
@@ -54,3 +57,52 @@ class VerificationModel(BaseModel):
         ...,
         description="If not sufficient, provide a concise critique. What is missing? What is superfluous? This will be used as a new query to generate a better answer. If the answer is sufficient return empty string.",
     )
+
+
+class AggregateMetric(str, Enum):
+    """What an analytics query computes over the matching tickets."""
+
+    COUNT = "count"
+    AVG_RESOLUTION_HOURS = "avg_resolution_hours"
+    LIST = "list"
+
+
+class AnalyticsQuery(BaseModel):
+    """A structured aggregate query over the incident tickets table."""
+
+    metric: AggregateMetric = Field(
+        ...,
+        description=(
+            "'count' to count tickets, 'avg_resolution_hours' for the average "
+            "time from created to resolved, 'list' to list matching tickets."
+        ),
+    )
+    filters: Dict[str, Union[str, List[str]]] = Field(
+        default_factory=dict,
+        description=(
+            "Exact-match filters by column. Allowed columns: priority, state, "
+            "assignment_group, category, location, caller, assigned_to, "
+            "updated_by. Values are lowercase; a list matches any of its values."
+        ),
+    )
+    date_field: str = Field(
+        "created",
+        description="Date column for within_days: 'created', 'updated' or 'resolved_time'.",
+    )
+    within_days: Optional[int] = Field(
+        None,
+        ge=1,
+        description="Only tickets whose date_field falls in the last N days, or null.",
+    )
+    group_by: Optional[str] = Field(
+        None,
+        description="Column to break the result down by (one of the filter columns), or null.",
+    )
+
+    @field_validator("filters")
+    @classmethod
+    def check_filters(cls, filters):
+        empty = [column for column, value in filters.items() if value == []]
+        if empty:
+            raise ValueError(f"Filters without values: {empty}")
+        return filters
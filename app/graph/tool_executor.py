@@ -1,9 +1,50 @@
+import threading
+from concurrent.futures import Future
+from app.retrieval_cache import normalize_query
 from app.services import get_all_documents, get_all_feedbacks
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
+
+
+class SharedRetrieval:
+    """
+    Deduplicates identical searches across graph invocations that run
+    concurrently (e.g. one batch request), so each distinct query is
+    embedded and searched only once. Queries differing only in case or
+    punctuation count as the same.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results: Dict[tuple, Future] = {}
+
+    def fetch(self, key: tuple, search: Callable):
+        with self._lock:
+            future = self._results.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._results[key] = future
+
+        if is_owner:
+            try:
+                future.set_result(search())
+            except Exception as e:
+                future.set_exception(e)
+
+        return future.result()
+
+
+def _search(shared: Optional[SharedRetrieval], key: tuple, search: Callable):
+    if shared is None:
+        return search()
+    return shared.fetch(key, search)
 
 
 def run_queries(
-    search_queries: List[str], search_numbers: Optional[List[str]] = None, **kwargs
+    search_queries: List[str],
+    search_numbers: Optional[List[str]] = None,
+    shared: Optional[SharedRetrieval] = None,
+    **kwargs,
 ):
     """
     Runs searches based on text queries and incident numbers separately,
@@ -16,22 +57,30 @@ def run_queries(
     if search_numbers:
         print("Executing 'if search_numbers:' block...")
         for number in search_numbers:
-            documents_for_number = get_all_documents(
-                query=number, incident_number=number
+            documents_for_number = _search(
+                shared,
+                ("doc", number.lower(), number.lower()),
+                lambda: get_all_documents(query=number, incident_number=number),
             )
             # print(f"search number res: {documents_for_number}")
             if documents_for_number:
                 all_retrieved_docs.append(documents_for_number)
 
     for query in search_queries:
-        documents_for_query = get_all_documents(query)
+        documents_for_query = _search(
+            shared,
+            ("doc", normalize_query(query), None),
+            lambda: get_all_documents(query),
+        )
         if documents_for_query:
             all_retrieved_docs.append(documents_for_query)
 
     return all_retrieved_docs
 
 
-def run_query_feedback(search_queries: List[str], **kwargs):
+def run_query_feedback(
+    search_queries: List[str], shared: Optional[SharedRetrieval] = None, **kwargs
+):
     """
     Runs searches based on text queries and incident numbers separately,
     then returns the aggregated results.
@@ -39,7 +88,11 @@ def run_query_feedback(search_queries: List[str], **kwargs):
     all_retrieved_feedback = []
 
     for query in search_queries:
-        documents_for_query = get_all_feedbacks(query)
+        documents_for_query = _search(
+            shared,
+            ("feedback", normalize_query(query)),
+            lambda: get_all_feedbacks(query),
+        )
         if documents_for_query:
             all_retrieved_feedback.append(documents_for_query)
 
@@ -10,6 +10,7 @@ from .nodes import (
     quality_gate_node,
     should_continue_after_verify,
     check_for_followup,
+    run_analytics_node,
 )
 from langgraph.checkpoint.memory import MemorySaver
 
@@ -22,6 +23,7 @@ workflow.add_node("generate_initial_answer", generate_initial_answer)
 workflow.add_node("casual_response", generate_casual_answer)
 workflow.add_node("historic_reponse", generate_historic_answer)
 workflow.add_node("run_tools", run_tool_node)
+workflow.add_node("run_analytics", run_analytics_node)
 workflow.add_node("final_answer", final_answer)
 workflow.add_node("quality_gate", quality_gate_node)
 
@@ -37,6 +39,7 @@ workflow.add_conditional_edges(
         "casual": "casual_response",
         "historic": "historic_reponse",
         "needs_search": "run_tools",
+        "analytics": "run_analytics",
     },
 )
 
@@ -44,6 +47,7 @@ workflow.add_conditional_edges(
 workflow.add_edge("casual_response", END)
 workflow.add_edge("historic_reponse", "final_answer")
 workflow.add_edge("run_tools", "final_answer")
+workflow.add_edge("run_analytics", "final_answer")
 workflow.add_edge("final_answer", "quality_gate")
 workflow.add_conditional_edges(
     "quality_gate",
@@ -53,4 +57,8 @@ workflow.add_conditional_edges(
 
 # Compile the graph
 final_graph = workflow.compile(checkpointer=memory)
-print(final_graph.get_graph().draw_mermaid())
+
+
+if __name__ == "__main__":
+    # python -m app.graph.workflow
+    print(final_graph.get_graph().draw_mermaid())
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import (
+    DEDUP_NEAR_DUPLICATES,
+    INGESTION_MODE,
+    TICKET_STORE_PATH,
+    VECTOR_SHARD_COUNT,
+    VECTOR_SHARD_KEY,
+)
+from app.dedup import collapse_near_duplicates
+from app.services import (
+    CHROMA_DB_PATH,
+    create_and_save_vector_db,
+    create_documents_from_excel,
+    create_field_chunks,
+    migrate_legacy_collection,
+    slim_document,
+)
+from app.ticket_store import save_tickets
+
+MANIFEST_FILE = "ingestion_manifest.json"
+
+# Bumped when the layout of what ingestion writes changes, forcing a re-ingest
+SCHEMA_VERSION = 3
+
+
+def manifest_path(vector_db_path: str = CHROMA_DB_PATH) -> str:
+    return os.path.join(vector_db_path, MANIFEST_FILE)
+
+
+def load_manifest(vector_db_path: str = CHROMA_DB_PATH) -> Optional[dict]:
+    try:
+        with open(manifest_path(vector_db_path)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_manifest(manifest: dict, vector_db_path: str = CHROMA_DB_PATH):
+    os.makedirs(vector_db_path, exist_ok=True)
+    tmp_path = manifest_path(vector_db_path) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path(vector_db_path))
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def current_sharding() -> str:
+    """The shard layout ingestion writes, e.g. "location" or "incident_hash/4"."""
+    if VECTOR_SHARD_KEY == "incident_hash":
+        return f"{VECTOR_SHARD_KEY}/{VECTOR_SHARD_COUNT}"
+    return VECTOR_SHARD_KEY
+
+
+def source_changed(source_path: str, vector_db_path: str = CHROMA_DB_PATH) -> bool:
+    """
+    Compares the source file with the manifest of the last ingestion.
+    Size and mtime are checked first; the file is only hashed when they differ.
+    """
+    manifest = load_manifest(vector_db_path)
+    if manifest is None or not os.path.exists(vector_db_path):
+        return True
+
+    if not os.path.exists(TICKET_STORE_PATH):
+        return True
+
+    if manifest.get("schema_version") != SCHEMA_VERSION:
+        return True
+
+    if manifest.get("ingestion_mode", "ticket") != INGESTION_MODE:
+        return True
+
+    if manifest.get("dedup", False) != DEDUP_NEAR_DUPLICATES:
+        return True
+
+    if manifest.get("sharding") != current_sharding():
+        return True
+
+    stat = os.stat(source_path)
+    if (
+        manifest.get("source_path") == os.path.abspath(source_path)
+        and manifest.get("source_size") == stat.st_size
+        and manifest.get("source_mtime") == stat.st_mtime
+    ):
+        return False
+
+    if manifest.get("source_sha256") != file_sha256(source_path):
+        return True
+
+    # Touched but identical content: remember the new mtime and skip
+    manifest.update(
+        source_path=os.path.abspath(source_path),
+        source_size=stat.st_size,
+        source_mtime=stat.st_mtime,
+    )
+    save_manifest(manifest, vector_db_path)
+    return False
+
+
+def ingest_if_changed(source_path: str, vector_db_path: str = CHROMA_DB_PATH) -> str:
+    """
+    Ingests `source_path` into the vector database only when it changed since
+    the last successful ingestion. Returns "skipped", "ingested" or "failed".
+    """
+    if not source_changed(source_path, vector_db_path):
+        print("Source unchanged since last ingestion; skipping.")
+        return "skipped"
+
+    stat = os.stat(source_path)
+    sha256 = file_sha256(source_path)
+
+    # A different layout can't be upserted over in place
+    manifest = load_manifest(vector_db_path) or {}
+    rebuild = (
+        manifest.get("schema_version") != SCHEMA_VERSION
+        or manifest.get("ingestion_mode", "ticket") != INGESTION_MODE
+        or manifest.get("dedup", False) != DEDUP_NEAR_DUPLICATES
+        or manifest.get("sharding") != current_sharding()
+    )
+    if rebuild:
+        migrate_legacy_collection(vector_db_path)
+
+    documents = create_documents_from_excel(source_path)
+    if not documents:
+        print("No documents created. Skipping ingestion.")
+        return "failed"
+
+    # Only one representative per near-duplicate cluster gets embedded
+    indexed = (
+        collapse_near_duplicates(documents) if DEDUP_NEAR_DUPLICATES else documents
+    )
+
+    # Full records go to the ticket store; the vector store keeps slim metadata
+    save_tickets([doc.metadata for doc in documents], replace_all=True)
+
+    if INGESTION_MODE == "field_chunks":
+        vector_store = create_and_save_vector_db(
+            create_field_chunks(indexed), vector_db_path, rebuild
+        )
+    else:
+        vector_store = create_and_save_vector_db(
+            [slim_document(doc) for doc in indexed], vector_db_path, rebuild
+        )
+    if vector_store is None:
+        return "failed"
+
+    save_manifest(
+        {
+            "source_path": os.path.abspath(source_path),
+            "source_size": stat.st_size,
+            "source_mtime": stat.st_mtime,
+            "source_sha256": sha256,
+            "document_count": len(documents),
+            "indexed_count": len(indexed),
+            "dedup": DEDUP_NEAR_DUPLICATES,
+            "sharding": current_sharding(),
+            "ingestion_mode": INGESTION_MODE,
+            "schema_version": SCHEMA_VERSION,
+            "ingested_at_utc": datetime.now(timezone.utc).isoformat(),
+        },
+        vector_db_path,
+    )
+    print("Vector database creation completed!")
+    return "ingested"
@@ -0,0 +1,139 @@
+import itertools
+import threading
+import time
+import urllib.request
+from typing import Callable, List, Optional
+
+import httpx
+
+
+class OllamaEndpoint:
+    """One Ollama host and the long-lived client bound to it."""
+
+    def __init__(self, url: str, client):
+        self.url = url
+        # One client per host: its httpx connection pool keeps connections alive
+        self.client = client
+        self.in_flight = 0
+        self.healthy = True
+        self.last_error = None
+
+
+class OllamaPool:
+    """
+    Routes model calls across several Ollama hosts, either to the least
+    loaded healthy host or round-robin, and fails over to the next host
+    when one cannot be reached. `on_health_change` is called with the number
+    of healthy hosts whenever it changes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        urls: List[str],
+        client_factory: Callable,
+        routing: str = "least_loaded",
+        on_health_change: Optional[Callable[[int], None]] = None,
+    ):
+        if not urls:
+            raise ValueError(f"No Ollama endpoints configured for the {name} pool.")
+        self.name = name
+        self.routing = routing
+        self.endpoints = [OllamaEndpoint(url, client_factory(url)) for url in urls]
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+        self._health_thread = None
+        self._on_health_change = on_health_change
+        self._healthy_count = len(self.endpoints)
+        if on_health_change:
+            on_health_change(self._healthy_count)
+
+    def _set_health(self, endpoint: OllamaEndpoint, healthy: bool, error=None):
+        with self._lock:
+            endpoint.healthy = healthy
+            endpoint.last_error = error
+            healthy_count = sum(1 for e in self.endpoints if e.healthy)
+            changed = healthy_count != self._healthy_count
+            self._healthy_count = healthy_count
+        if changed and self._on_health_change:
+            self._on_health_change(healthy_count)
+
+    def _ordered_endpoints(self) -> List[OllamaEndpoint]:
+        """Healthy endpoints in routing order, followed by the unhealthy ones."""
+        with self._lock:
+            if self.routing == "round_robin":
+                start = next(self._round_robin) % len(self.endpoints)
+                ordered = self.endpoints[start:] + self.endpoints[:start]
+            else:
+                ordered = sorted(self.endpoints, key=lambda e: e.in_flight)
+        return [e for e in ordered if e.healthy] + [e for e in ordered if not e.healthy]
+
+    def run(self, call: Callable):
+        """Runs `call(client)` on the preferred endpoint, failing over on connection errors."""
+        last_error = None
+        for endpoint in self._ordered_endpoints():
+            with self._lock:
+                endpoint.in_flight += 1
+            try:
+                return call(endpoint.client)
+            except (ConnectionError, httpx.TransportError) as e:
+                print(f"Ollama {self.name} endpoint {endpoint.url} unreachable: {e}")
+                self._set_health(endpoint, False, str(e))
+                last_error = e
+            finally:
+                with self._lock:
+                    endpoint.in_flight -= 1
+        raise last_error
+
+    def check_health(self, timeout: float = 2.0) -> bool:
+        """Pings every endpoint and records which ones respond."""
+        for endpoint in self.endpoints:
+            try:
+                with urllib.request.urlopen(
+                    f"{endpoint.url.rstrip('/')}/api/tags", timeout=timeout
+                ) as response:
+                    self._set_health(endpoint, response.status == 200)
+            except Exception as e:
+                self._set_health(endpoint, False, str(e))
+        return any(endpoint.healthy for endpoint in self.endpoints)
+
+    def warm_up(self, call: Callable) -> bool:
+        """Runs `call(client)` once on every healthy endpoint so the model is loaded."""
+        warmed = False
+        for endpoint in self.endpoints:
+            if not endpoint.healthy:
+                continue
+            try:
+                call(endpoint.client)
+                warmed = True
+                print(f"Warmed up {self.name} model on {endpoint.url}")
+            except Exception as e:
+                print(f"Warmup of {self.name} model on {endpoint.url} failed: {e}")
+                self._set_health(endpoint, False, str(e))
+        return warmed
+
+    def start_health_checks(self, interval_seconds: float):
+        """Re-checks endpoint health in a daemon thread so failed hosts rejoin."""
+        if self._health_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval_seconds)
+                self.check_health()
+
+        self._health_thread = threading.Thread(
+            target=loop, name=f"ollama-{self.name}-health", daemon=True
+        )
+        self._health_thread.start()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "url": endpoint.url,
+                "healthy": endpoint.healthy,
+                "in_flight": endpoint.in_flight,
+                "last_error": endpoint.last_error,
+            }
+            for endpoint in self.endpoints
+        ]
@@ -0,0 +1,116 @@
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import closing
+from typing import Callable, Dict
+
+from app.config import RETRIEVAL_CACHE_SIZE, TICKET_STORE_PATH
+
+# Collections whose writes invalidate cached searches
+DOCS_COLLECTION = "docs"
+FEEDBACK_COLLECTION = "feedback"
+
+
+def normalize_query(text: str) -> str:
+    """Lowercased query with punctuation and repeated whitespace removed."""
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+# Store paths whose versions table already exists
+_table_ready = set()
+_table_lock = threading.Lock()
+
+
+def _connect(store_path: str) -> sqlite3.Connection:
+    """Plain connection; the table is only created on the first call per process."""
+    if store_path not in _table_ready:
+        with _table_lock:
+            if store_path not in _table_ready:
+                connection = sqlite3.connect(store_path, timeout=30)
+                with closing(connection), connection:
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS collection_versions "
+                        "(collection TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+                    )
+                _table_ready.add(store_path)
+    return sqlite3.connect(store_path, timeout=30)
+
+
+def get_collection_versions(store_path: str = TICKET_STORE_PATH) -> Dict[str, int]:
+    with closing(_connect(store_path)) as connection:
+        rows = connection.execute(
+            "SELECT collection, version FROM collection_versions"
+        ).fetchall()
+    return dict(rows)
+
+
+def bump_collection_version(collection: str, store_path: str = TICKET_STORE_PATH):
+    """
+    Marks `collection` as changed. Versions live in SQLite next to the
+    tickets, so writes from other processes (e.g. the change feed) also
+    invalidate this process's cached searches.
+    """
+    with closing(_connect(store_path)) as connection, connection:
+        connection.execute(
+            "INSERT INTO collection_versions (collection, version) VALUES (?, 1) "
+            "ON CONFLICT(collection) DO UPDATE SET version = version + 1",
+            (collection,),
+        )
+
+
+class RetrievalCache:
+    """
+    LRU cache of search results keyed on (collection, normalized query,
+    filter, k). Each entry remembers the collection version it was read at
+    and is only served while that version is current.
+    """
+
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, collection: str, key: tuple, search: Callable):
+        if self.max_entries <= 0:
+            return search()
+
+        # Read the version before searching, so a write that lands during the
+        # search leaves this entry already stale
+        version = get_collection_versions().get(collection, 0)
+        cache_key = (collection, *key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return list(entry[1])
+            self.misses += 1
+
+        result = search()
+        if result is None:
+            return None
+
+        with self._lock:
+            self._entries[cache_key] = (version, list(result))
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def metrics(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "collection_versions": get_collection_versions(),
+            }
+
+
+retrieval_cache = RetrievalCache()
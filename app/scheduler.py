@@ -0,0 +1,188 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict
+
+from app.config import (
+    OLLAMA_MAX_CONCURRENCY,
+    OLLAMA_QUEUE_DEADLINE_SECONDS,
+)
+
+
+class Priority(IntEnum):
+    """Scheduling priority of Ollama-bound work. Lower values run first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+    FEEDBACK = 2
+
+
+_current_priority: ContextVar[Priority] = ContextVar(
+    "ollama_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def request_priority(priority: Priority):
+    """Runs every LLM/embedding call made inside the block at `priority`."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class SchedulerOverloaded(Exception):
+    """Raised when a call would wait in the queue past the deadline."""
+
+    def __init__(self, model: str, retry_after: float):
+        self.model = model
+        self.retry_after = max(1, int(retry_after + 0.5))
+        super().__init__(
+            f"Model '{model}' is overloaded, retry after {self.retry_after}s."
+        )
+
+
+class ModelScheduler:
+    """
+    Admission control for a single model: caps concurrent in-flight calls,
+    hands free slots to the highest-priority waiter first and rejects calls
+    whose expected queue wait would exceed the deadline.
+    """
+
+    def __init__(self, model: str, max_concurrency: int, deadline_seconds: float):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.deadline_seconds = deadline_seconds
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._avg_service_seconds = 1.0
+
+        self._completed = 0
+        self._rejected = 0
+        self._waits = deque(maxlen=1000)
+
+    def resize(self, max_concurrency: int):
+        """Changes the concurrency cap, e.g. when hosts join or leave the pool."""
+        with self._cond:
+            self.max_concurrency = max(1, max_concurrency)
+            self._cond.notify_all()
+
+    def _estimated_wait(self, priority: Priority) -> float:
+        """Expected wait for a new call, given the work queued ahead of it."""
+        if self._in_flight < self.max_concurrency and not self._queue:
+            return 0.0
+        ahead = sum(1 for entry in self._queue if entry[0] <= priority)
+        rounds = (ahead // self.max_concurrency) + 1
+        return rounds * self._avg_service_seconds
+
+    def _acquire(self, priority: Priority) -> float:
+        with self._cond:
+            if self._in_flight < self.max_concurrency and not self._queue:
+                self._in_flight += 1
+                self._waits.append(0.0)
+                return 0.0
+
+            estimate = self._estimated_wait(priority)
+            if estimate > self.deadline_seconds:
+                self._rejected += 1
+                raise SchedulerOverloaded(self.model, estimate)
+
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._queue, entry)
+            enqueued_at = time.monotonic()
+            deadline_at = enqueued_at + self.deadline_seconds
+
+            while not (
+                self._in_flight < self.max_concurrency and self._queue[0] == entry
+            ):
+                remaining = deadline_at - time.monotonic()
+                if remaining <= 0:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._rejected += 1
+                    self._cond.notify_all()
+                    raise SchedulerOverloaded(self.model, self._avg_service_seconds)
+                self._cond.wait(remaining)
+
+            heapq.heappop(self._queue)
+            self._in_flight += 1
+            waited = time.monotonic() - enqueued_at
+            self._waits.append(waited)
+            # Another slot may still be free for the next waiter in line
+            self._cond.notify_all()
+            return waited
+
+    def _release(self, service_seconds: float):
+        with self._cond:
+            self._in_flight -= 1
+            self._completed += 1
+            self._avg_service_seconds = (
+                0.8 * self._avg_service_seconds + 0.2 * service_seconds
+            )
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Holds one of the model's concurrency slots for the duration of a call."""
+        self._acquire(_current_priority.get())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            waits = sorted(self._waits)
+            queued_by_priority = {priority.name.lower(): 0 for priority in Priority}
+            for priority, _ in self._queue:
+                queued_by_priority[Priority(priority).name.lower()] += 1
+
+            def percentile(p):
+                if not waits:
+                    return 0.0
+                return round(waits[min(len(waits) - 1, int(p * len(waits)))], 4)
+
+            return {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": queued_by_priority,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "wait_seconds_p50": percentile(0.50),
+                "wait_seconds_p95": percentile(0.95),
+                "wait_seconds_max": round(waits[-1], 4) if waits else 0.0,
+                "avg_service_seconds": round(self._avg_service_seconds, 4),
+            }
+
+
+_schedulers: Dict[str, ModelScheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(model: str) -> ModelScheduler:
+    """Returns the shared scheduler for `model`, creating it on first use."""
+    with _schedulers_lock:
+        if model not in _schedulers:
+            _schedulers[model] = ModelScheduler(
+                model,
+                max_concurrency=OLLAMA_MAX_CONCURRENCY.get(model, 1),
+                deadline_seconds=OLLAMA_QUEUE_DEADLINE_SECONDS,
+            )
+        return _schedulers[model]
+
+
+def scheduler_metrics() -> dict:
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return {scheduler.model: scheduler.metrics() for scheduler in schedulers}
@@ -1,18 +1,32 @@
 import re
+import contextvars
+import hashlib
+import json
 import time
 import logging
 from datetime import datetime
-import pandas as pd
-import os
+from concurrent.futures import ThreadPoolExecutor
 from langchain.schema import Document
 
-# --- Start of Changes ---
-from langchain_community.vectorstores import Chroma
-
 from typing import Optional, List
 
-from llms import embeddings
-
+from app.config import (
+    CHUNK_MAX_CHARS,
+    INGESTION_MODE,
+    VECTOR_SEARCH_THREADS,
+    VECTOR_SHARD_COUNT,
+    VECTOR_SHARD_KEY,
+    VECTOR_SHARD_WORKERS,
+)
+from app.retrieval_cache import (
+    DOCS_COLLECTION,
+    FEEDBACK_COLLECTION,
+    bump_collection_version,
+    normalize_query,
+    retrieval_cache,
+)
+from app.scheduler import SchedulerOverloaded
+from app.ticket_store import get_representatives, get_tickets
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +34,130 @@ logger = logging.getLogger(__name__)
 CHROMA_DB_PATH = "chroma_vector_db"
 
 
+def create_document_from_row(row, index) -> Document:
+    """Normalize one ticket row (Excel row or dict) into a LangChain Document"""
+    import pandas as pd
+
+    content_lines = []
+
+    # Extract all fields (same as your original code)
+    incident_number = str(row["incident_number"]).strip().lower()
+    location = str(row["location"]).strip().lower()
+    title = str(row["title"]).strip()
+    description = str(row["description"]).strip().lower()
+    priority = str(row["priority"]).strip().lower()
+    caller = str(row["caller"]).strip().lower()
+    assignment_group = str(row["assignment_group"]).strip().lower()
+    assigned_to = str(row["assigned_to"]).strip().lower()
+    state = str(row["state"]).strip().lower()
+    created = str(row["created"])
+    updated = str(row["updated"])
+    close_notes = str(row["close_notes"]).strip().lower()
+    resolved_time = str(row["resolved_time"])
+    updated_by = str(row["updated_by"])
+    work_notes = str(row["work_notes"]).strip().lower()
+    category = str(row["category"]).strip().lower()
+    additional_comments = str(row["additional_comments"]).strip().lower()
+
+    # Build content (same as your original code)
+    content_lines.append(f"INCIDENT_NUMBER: {incident_number}")
+
+    if pd.notna(title):
+        content_lines.append(
+            f"HAS_REPORTED_ISSUE: For incident number:{incident_number} -> Reported Issue: {title}"
+        )
+    if pd.notna(description):
+        content_lines.append(
+            f"HAS_DESCRIPTION: For incident number:{incident_number} -> Description: {description}"
+        )
+    if pd.notna(location):
+        content_lines.append(
+            f"HAS_LOCATION: For incident number: {incident_number} -> Location: {location}"
+        )
+    if pd.notna(close_notes):
+        content_lines.append(
+            f"HAS_CLOSE_NOTES: For incident number:{incident_number} -> Close Notes: {close_notes}"
+        )
+    if pd.notna(priority):
+        content_lines.append(
+            f"HAS_PRIORITY: For incident number:{incident_number} -> Priority: {priority}"
+        )
+    if pd.notna(caller):
+        content_lines.append(
+            f"HAS_CALLER: For incident number:{incident_number} -> Caller: {caller}"
+        )
+    if pd.notna(assignment_group):
+        content_lines.append(
+            f"HAS_ASSIGNMENT_GROUP: For incident number:{incident_number} -> Assignment_Group: {assignment_group}"
+        )
+    if pd.notna(assigned_to):
+        content_lines.append(
+            f"HAS_ASSIGNED_TO: For incident number:{incident_number} -> Assigned_To: {assigned_to}"
+        )
+    if pd.notna(state):
+        content_lines.append(
+            f"HAS_STATE:For incident number: {incident_number} -> State: {state}"
+        )
+    if pd.notna(created):
+        content_lines.append(
+            f"HAS_CREATED_DATE:For incident number: {incident_number} -> Created on: {created}"
+        )
+    if pd.notna(updated):
+        content_lines.append(
+            f"HAS_UPDATED_DATE:For incident number: {incident_number} -> Updated on: {updated}"
+        )
+    if pd.notna(resolved_time):
+        content_lines.append(
+            f"HAS_RESOLVED_TIME: For incident number:{incident_number} -> Resolved time: {resolved_time}"
+        )
+    if pd.notna(updated_by):
+        content_lines.append(
+            f"HAS_UPDATED_BY: For incident number:{incident_number} -> Updated by: {updated_by}"
+        )
+    if pd.notna(work_notes):
+        content_lines.append(
+            f"HAS_WORK_NOTES: For incident number:{incident_number} -> Work notes: {work_notes}"
+        )
+    if pd.notna(category):
+        content_lines.append(
+            f"HAS_CATEGORY: For incident number:{incident_number} -> Category: {category}"
+        )
+    if pd.notna(additional_comments):
+        content_lines.append(
+            f"HAS_ADDITIONAL_COMMENTS: For incident number:{incident_number} -> Additional comments: {additional_comments}"
+        )
+
+    content = "\n".join(content_lines) + "\n"
+
+    # Create metadata with all document values
+    metadata = {
+        "index": index,
+        "incident_number": incident_number,
+        "location": location,
+        "title": title,
+        "description": description,
+        "priority": priority,
+        "caller": caller,
+        "assignment_group": assignment_group,
+        "assigned_to": assigned_to,
+        "state": state,
+        "created": created,
+        "updated": updated,
+        "close_notes": close_notes,
+        "resolved_time": resolved_time,
+        "updated_by": updated_by,
+        "work_notes": work_notes,
+        "category": category,
+        "additional_comments": additional_comments,
+        "type": "doc",
+    }
+
+    return Document(page_content=content, metadata=metadata)
+
+
 def create_documents_from_excel(excel_path):
     """Extract data from Excel and create LangChain Documents"""
+    import pandas as pd
 
     # Load Excel file
     try:
@@ -37,175 +173,439 @@ def create_documents_from_excel(excel_path):
     documents = []
 
     for index, row in df.iterrows():
-        content_lines = []
-
-        # Extract all fields (same as your original code)
-        incident_number = str(row["incident_number"]).strip().lower()
-        location = str(row["location"]).strip().lower()
-        title = str(row["title"]).strip()
-        description = str(row["description"]).strip().lower()
-        priority = str(row["priority"]).strip().lower()
-        caller = str(row["caller"]).strip().lower()
-        assignment_group = str(row["assignment_group"]).strip().lower()
-        assigned_to = str(row["assigned_to"]).strip().lower()
-        state = str(row["state"]).strip().lower()
-        created = str(row["created"])
-        updated = str(row["updated"])
-        close_notes = str(row["close_notes"]).strip().lower()
-        resolved_time = str(row["resolved_time"])
-        updated_by = str(row["updated_by"])
-        work_notes = str(row["work_notes"]).strip().lower()
-        category = str(row["category"]).strip().lower()
-        additional_comments = str(row["additional_comments"]).strip().lower()
-
-        # Build content (same as your original code)
-        content_lines.append(f"INCIDENT_NUMBER: {incident_number}")
-
-        if pd.notna(title):
-            content_lines.append(
-                f"HAS_REPORTED_ISSUE: For incident number:{incident_number} -> Reported Issue: {title}"
-            )
-        if pd.notna(description):
-            content_lines.append(
-                f"HAS_DESCRIPTION: For incident number:{incident_number} -> Description: {description}"
-            )
-        if pd.notna(location):
-            content_lines.append(
-                f"HAS_LOCATION: For incident number: {incident_number} -> Location: {location}"
-            )
-        if pd.notna(close_notes):
-            content_lines.append(
-                f"HAS_CLOSE_NOTES: For incident number:{incident_number} -> Close Notes: {close_notes}"
-            )
-        if pd.notna(priority):
-            content_lines.append(
-                f"HAS_PRIORITY: For incident number:{incident_number} -> Priority: {priority}"
-            )
-        if pd.notna(caller):
-            content_lines.append(
-                f"HAS_CALLER: For incident number:{incident_number} -> Caller: {caller}"
-            )
-        if pd.notna(assignment_group):
-            content_lines.append(
-                f"HAS_ASSIGNMENT_GROUP: For incident number:{incident_number} -> Assignment_Group: {assignment_group}"
-            )
-        if pd.notna(assigned_to):
-            content_lines.append(
-                f"HAS_ASSIGNED_TO: For incident number:{incident_number} -> Assigned_To: {assigned_to}"
-            )
-        if pd.notna(state):
-            content_lines.append(
-                f"HAS_STATE:For incident number: {incident_number} -> State: {state}"
-            )
-        if pd.notna(created):
-            content_lines.append(
-                f"HAS_CREATED_DATE:For incident number: {incident_number} -> Created on: {created}"
-            )
-        if pd.notna(updated):
-            content_lines.append(
-                f"HAS_UPDATED_DATE:For incident number: {incident_number} -> Updated on: {updated}"
-            )
-        if pd.notna(resolved_time):
-            content_lines.append(
-                f"HAS_RESOLVED_TIME: For incident number:{incident_number} -> Resolved time: {resolved_time}"
-            )
-        if pd.notna(updated_by):
-            content_lines.append(
-                f"HAS_UPDATED_BY: For incident number:{incident_number} -> Updated by: {updated_by}"
-            )
-        if pd.notna(work_notes):
-            content_lines.append(
-                f"HAS_WORK_NOTES: For incident number:{incident_number} -> Work notes: {work_notes}"
-            )
-        if pd.notna(category):
-            content_lines.append(
-                f"HAS_CATEGORY: For incident number:{incident_number} -> Category: {category}"
-            )
-        if pd.notna(additional_comments):
-            content_lines.append(
-                f"HAS_ADDITIONAL_COMMENTS: For incident number:{incident_number} -> Additional comments: {additional_comments}"
-            )
+        documents.append(create_document_from_row(row, index))
+
+    print(f"Created {len(documents)} documents from Excel file")
+    return documents
 
-        content = "\n".join(content_lines) + "\n"
 
-        # Create metadata with all document values
+# Ticket fields embedded as their own chunks, with their display labels
+CHUNK_TEXT_FIELDS = {
+    "title": "Reported Issue",
+    "description": "Description",
+    "close_notes": "Close Notes",
+    "work_notes": "Work notes",
+    "additional_comments": "Additional comments",
+}
+
+# Short fields embedded together in one "summary" chunk per ticket
+CHUNK_SUMMARY_FIELDS = {
+    "location": "Location",
+    "priority": "Priority",
+    "caller": "Caller",
+    "assignment_group": "Assignment_Group",
+    "assigned_to": "Assigned_To",
+    "state": "State",
+    "category": "Category",
+    "created": "Created on",
+    "updated": "Updated on",
+    "resolved_time": "Resolved time",
+    "updated_by": "Updated by",
+}
+
+# The only ticket fields kept in vector store metadata: the id and the
+# filterable fields. Full records live in the ticket store.
+VECTOR_METADATA_FIELDS = [
+    "incident_number",
+    "location",
+    "priority",
+    "state",
+    "category",
+    "assignment_group",
+]
+
+
+def slim_document(document: Document) -> Document:
+    """Copy of a ticket document whose metadata holds only the vector store fields."""
+    metadata = {field: document.metadata[field] for field in VECTOR_METADATA_FIELDS}
+    metadata["type"] = document.metadata["type"]
+    if document.metadata.get("duplicate_incident_numbers"):
+        metadata["duplicate_incident_numbers"] = document.metadata[
+            "duplicate_incident_numbers"
+        ]
+    return Document(page_content=document.page_content, metadata=metadata)
+
+
+def _has_value(value) -> bool:
+    return value not in (None, "", "nan", "nat", "NaT", "None")
+
+
+def split_into_sections(text: str, max_chars: int = CHUNK_MAX_CHARS) -> List[str]:
+    """Splits long text on sentence boundaries into sections of at most ~max_chars."""
+    if len(text) <= max_chars:
+        return [text]
+
+    # Sentences, with any sentence longer than a section broken into words
+    pieces = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text):
+        pieces += sentence.split() if len(sentence) > max_chars else [sentence]
+
+    sections, current = [], ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > max_chars:
+            sections.append(current)
+            current = ""
+        current = f"{current} {piece}".strip()
+    if current:
+        sections.append(current)
+    return sections
+
+
+def create_field_chunks(documents: List[Document]) -> List[Document]:
+    """
+    Turns ticket documents into compact per-field chunks linked to their
+    parent incident: one chunk per text field section plus one summary chunk
+    holding the short fields.
+    """
+    chunks = []
+    for document in documents:
+        ticket = document.metadata
+        incident_number = ticket["incident_number"]
+        parent = {field: ticket[field] for field in VECTOR_METADATA_FIELDS}
+
+        summary_lines = [
+            f"{label}: {ticket[field]}"
+            for field, label in CHUNK_SUMMARY_FIELDS.items()
+            if _has_value(ticket[field])
+        ]
+        if ticket.get("duplicate_incident_numbers"):
+            summary_lines.append(
+                f"Also reported as: {ticket['duplicate_incident_numbers']}"
+            )
+        field_texts = [("summary", "\n".join(summary_lines))]
+        field_texts += [
+            (field, ticket[field])
+            for field in CHUNK_TEXT_FIELDS
+            if _has_value(ticket[field])
+        ]
+
+        for field, text in field_texts:
+            label = CHUNK_TEXT_FIELDS.get(field)
+            # The summary is a handful of short lines and stays whole
+            sections = split_into_sections(text) if label else [text]
+            for section, section_text in enumerate(sections):
+                body = f"{label}: {section_text}" if label else section_text
+                chunks.append(
+                    Document(
+                        page_content=f"INCIDENT_NUMBER: {incident_number}\n{body}",
+                        metadata={
+                            **parent,
+                            "field": field,
+                            "section": section,
+                            "type": "chunk",
+                        },
+                    )
+                )
+
+    print(f"Created {len(chunks)} field chunks from {len(documents)} documents")
+    return chunks
+
+
+def assemble_parent_documents(
+    chunks: List[Document], max_parents: int
+) -> List[Document]:
+    """
+    Groups retrieved chunks by parent incident (in rank order) and builds one
+    context document per parent holding only the fields that matched.
+    """
+    parents = {}
+    for chunk in chunks:
+        incident_number = chunk.metadata["incident_number"]
+        if incident_number not in parents:
+            if len(parents) >= max_parents:
+                continue
+            parents[incident_number] = {"metadata": chunk.metadata, "chunks": []}
+        parents[incident_number]["chunks"].append(chunk)
+
+    field_order = ["summary", *CHUNK_TEXT_FIELDS]
+    titles = get_tickets(list(parents), ["title"])
+    documents = []
+    for incident_number, parent in parents.items():
+        matched = sorted(
+            parent["chunks"],
+            key=lambda c: (
+                field_order.index(c.metadata["field"]),
+                c.metadata["section"],
+            ),
+        )
         metadata = {
-            "index": index,
-            "incident_number": incident_number,
-            "location": location,
-            "title": title,
-            "description": description,
-            "priority": priority,
-            "caller": caller,
-            "assignment_group": assignment_group,
-            "assigned_to": assigned_to,
-            "state": state,
-            "created": created,
-            "updated": updated,
-            "close_notes": close_notes,
-            "resolved_time": resolved_time,
-            "updated_by": updated_by,
-            "work_notes": work_notes,
-            "category": category,
-            "additional_comments": additional_comments,
-            "type": "doc",
+            field: parent["metadata"][field] for field in VECTOR_METADATA_FIELDS
         }
 
-        document = Document(page_content=content, metadata=metadata)
-        documents.append(document)
-
-    print(f"Created {len(documents)} documents from Excel file")
+        lines = [f"INCIDENT_NUMBER: {incident_number}"]
+        title = titles.get(incident_number, {}).get("title")
+        if title and "title" not in {c.metadata["field"] for c in matched}:
+            lines.append(f"Reported Issue: {title}")
+        for chunk in matched:
+            body = chunk.page_content.split("\n", 1)[1]
+            label = CHUNK_TEXT_FIELDS.get(chunk.metadata["field"])
+            if lines[-1].startswith(f"{label}: "):
+                # Further section of the same field: continue its line
+                lines[-1] += " " + body[len(label) + 2 :]
+            else:
+                lines.append(body)
+
+        metadata["matched_fields"] = ",".join(
+            dict.fromkeys(c.metadata["field"] for c in matched)
+        )
+        metadata["type"] = "doc"
+        documents.append(
+            Document(page_content="\n".join(lines) + "\n", metadata=metadata)
+        )
     return documents
 
 
+def document_id(document: Document) -> str:
+    """Stable vector store id, so re-ingesting a ticket replaces its old entry."""
+    metadata = document.metadata
+    parts = [metadata["type"], metadata["incident_number"]]
+    if metadata["type"] == "chunk":
+        parts += [metadata["field"], str(metadata["section"])]
+    return "-".join(parts)
+
+
 # --- Start of Changes: Replaced FAISS with ChromaDB ---
-def create_and_save_vector_db(documents, vector_db_path=CHROMA_DB_PATH):
-    """Create or update a persistent ChromaDB vector database."""
-    if not os.path.exists(vector_db_path):
-        if not documents:
-            print("No documents provided to create or update the vector database.")
-            return None
+# Ticket entries and feedback live in separate Chroma collections. Ticket
+# entries are further split into shards by VECTOR_SHARD_KEY.
+DOCS_COLLECTION_PREFIX = "docs"
+FEEDBACK_COLLECTION_NAME = "feedback"
+# The single collection used before sharding
+LEGACY_COLLECTION_NAME = "langchain"
+
+_search_pool = ThreadPoolExecutor(
+    max_workers=VECTOR_SEARCH_THREADS, thread_name_prefix="shard-search"
+)
+
+
+def shard_name(metadata: dict) -> str:
+    """Collection holding the entries of the ticket described by `metadata`."""
+    if VECTOR_SHARD_KEY == "incident_hash":
+        digest = hashlib.sha1(metadata["incident_number"].encode()).hexdigest()
+        return f"{DOCS_COLLECTION_PREFIX}-{int(digest, 16) % VECTOR_SHARD_COUNT}"
+    if VECTOR_SHARD_KEY in ("location", "category"):
+        value = str(metadata.get(VECTOR_SHARD_KEY) or "none")
+        # Chroma names allow [a-zA-Z0-9._-]; the hash keeps slugs distinct
+        slug = re.sub(r"[^a-z0-9]+", "-", value.lower()).strip("-")[:40] or "none"
+        digest = hashlib.sha1(value.encode()).hexdigest()[:6]
+        return f"{DOCS_COLLECTION_PREFIX}-{slug}-{digest}"
+    return DOCS_COLLECTION_PREFIX
+
+
+def _chroma_client(vector_db_path=CHROMA_DB_PATH):
+    # Same settings as the Chroma vector store, so both share one client
+    import chromadb
+    from chromadb.config import Settings
+
+    return chromadb.Client(
+        Settings(is_persistent=True, persist_directory=vector_db_path)
+    )
 
-        # Instantiate Chroma with a persistent directory.
-        # This will create the directory if it doesn't exist, or load it if it does.
-        vector_store = Chroma(
-            persist_directory=vector_db_path, embedding_function=embeddings
+
+def list_shards(vector_db_path=CHROMA_DB_PATH) -> List[str]:
+    """Names of the existing ticket shard collections."""
+    names = [
+        getattr(collection, "name", collection)
+        for collection in _chroma_client(vector_db_path).list_collections()
+    ]
+    return sorted(
+        name
+        for name in names
+        if name == DOCS_COLLECTION_PREFIX
+        or name.startswith(f"{DOCS_COLLECTION_PREFIX}-")
+    )
+
+
+def shards_for_incident(incident_number: str, shards: List[str]) -> List[str]:
+    """
+    The shards that can hold `incident_number`: exactly one when the shard
+    key is known for it, looked up in the ticket store if needed.
+    """
+    number = incident_number.lower()
+    if VECTOR_SHARD_KEY == "incident_hash":
+        metadata = {"incident_number": number}
+    elif VECTOR_SHARD_KEY in ("location", "category"):
+        metadata = get_tickets([number], [VECTOR_SHARD_KEY]).get(number)
+        if metadata is None:
+            return shards
+    else:
+        metadata = {}
+    name = shard_name(metadata)
+    return [name] if name in shards else []
+
+
+def migrate_legacy_collection(vector_db_path=CHROMA_DB_PATH):
+    """
+    Moves feedback out of the pre-sharding collection, keeping its embeddings,
+    and drops that collection. Its ticket entries are re-ingested instead.
+    """
+    client = _chroma_client(vector_db_path)
+    names = [getattr(c, "name", c) for c in client.list_collections()]
+    if LEGACY_COLLECTION_NAME not in names:
+        return
+
+    legacy = client.get_collection(LEGACY_COLLECTION_NAME)
+    stored = legacy.get(
+        where={"type": "feedback"},
+        include=["documents", "metadatas", "embeddings"],
+    )
+    if stored["ids"]:
+        client.get_or_create_collection(FEEDBACK_COLLECTION_NAME).upsert(
+            ids=stored["ids"],
+            documents=stored["documents"],
+            metadatas=stored["metadatas"],
+            embeddings=stored["embeddings"],
         )
+        bump_collection_version(FEEDBACK_COLLECTION)
+    client.delete_collection(LEGACY_COLLECTION_NAME)
+    print(f"Moved {len(stored['ids'])} feedback documents out of the legacy collection")
 
-        batch_size = 50
-        delay = 1.0
 
-        print(f"Processing {len(documents)} documents in batches of {batch_size}...")
+def _upsert_shard(name, documents, ids, vector_db_path) -> int:
+    """Upserts one shard's entries in batches; returns the failed batch count."""
+    vector_store = load_vector_db(vector_db_path, name)
+    if vector_store is None:
+        return 1
 
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i : i + batch_size]
-            batch_num = (i // batch_size) + 1
-            total_batches = (len(documents) + batch_size - 1) // batch_size
+    batch_size = 50
+    failed_batches = 0
 
-            print(
-                f"Processing batch {batch_num}/{total_batches} ({len(batch)} documents)..."
-            )
+    print(
+        f"Processing {len(documents)} documents in batches of {batch_size} for {name}..."
+    )
 
+    for i in range(0, len(documents), batch_size):
+        batch = documents[i : i + batch_size]
+        batch_num = (i // batch_size) + 1
+        total_batches = (len(documents) + batch_size - 1) // batch_size
+
+        print(
+            f"Processing {name} batch {batch_num}/{total_batches} ({len(batch)} documents)..."
+        )
+
+        while True:
             try:
-                # Add documents to the Chroma collection. This handles both creation and updates.
-                vector_store.add_documents(batch)
+                # Upsert into the Chroma collection. This handles both creation and updates.
+                vector_store.add_documents(batch, ids=ids[i : i + batch_size])
                 print(f"Batch {batch_num} completed successfully")
 
+            except SchedulerOverloaded as e:
+                # Interactive traffic has the embedding model busy; wait our turn
+                print(f"{e} Retrying {name} batch {batch_num}.")
+                time.sleep(e.retry_after)
+                continue
+
             except Exception as e:
-                print(f"Error processing batch {batch_num}: {str(e)}")
+                failed_batches += 1
+                print(f"Error processing {name} batch {batch_num}: {str(e)}")
+            break
 
-        # Chroma automatically persists changes to the directory, so no explicit save is needed.
-        print(f"Vector database at {vector_db_path} is up to date.")
-        return vector_store
+    return failed_batches
 
 
-def load_vector_db(vector_db_path=CHROMA_DB_PATH):
-    """Load the ChromaDB vector database from a persistent directory."""
+def create_and_save_vector_db(
+    documents, vector_db_path=CHROMA_DB_PATH, rebuild=False, incident_numbers=None
+):
+    """
+    Create or update a persistent ChromaDB vector database. Documents are
+    upserted under stable ids into their shard, shards in parallel, and
+    ticket documents no longer in `documents` are removed, so the shards
+    mirror the latest source file.
+    With `rebuild`, existing ticket shards are dropped first; Chroma merges
+    metadata on upsert, so this is needed when the metadata layout changes.
+    With `incident_numbers`, only the entries of those incidents are replaced
+    and the rest of the collection is left alone.
+    """
+    if not documents:
+        print("No documents provided to create or update the vector database.")
+        return None
+
+    try:
+        client = _chroma_client(vector_db_path)
+        existing_shards = list_shards(vector_db_path)
+    except Exception as e:
+        print(f"Error loading ChromaDB vector database: {e}")
+        return None
+
+    if incident_numbers is not None:
+        # The shard key may have changed, so look in every shard
+        for name in existing_shards:
+            client.get_collection(name).delete(
+                where={
+                    "$and": [
+                        {"type": {"$in": ["doc", "chunk"]}},
+                        {"incident_number": {"$in": list(incident_numbers)}},
+                    ]
+                }
+            )
+    elif rebuild:
+        print("Dropping existing ticket shards before rebuilding...")
+        for name in existing_shards:
+            client.delete_collection(name)
+        existing_shards = []
+
+    # Later rows for the same incident win
+    documents_by_id = {document_id(doc): doc for doc in documents}
+    shards = {}
+    for id_, doc in documents_by_id.items():
+        shard = shards.setdefault(
+            shard_name(doc.metadata), {"ids": [], "documents": []}
+        )
+        shard["ids"].append(id_)
+        shard["documents"].append(doc)
+
+    with ThreadPoolExecutor(max_workers=VECTOR_SHARD_WORKERS) as executor:
+        # Each task gets its own copy of the context, e.g. the request priority
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                _upsert_shard,
+                name,
+                shard["documents"],
+                shard["ids"],
+                vector_db_path,
+            )
+            for name, shard in shards.items()
+        ]
+        failed_batches = sum(future.result() for future in futures)
+
+    if failed_batches:
+        print(f"{failed_batches} batches failed; vector database is incomplete.")
+        return None
+
+    # Drop tickets that disappeared from the source or moved to another shard,
+    # including legacy random ids and entries written under the other
+    # ingestion mode
+    if incident_numbers is None:
+        for name in existing_shards:
+            collection = client.get_collection(name)
+            existing_ids = collection.get(
+                where={"type": {"$in": ["doc", "chunk"]}}, include=[]
+            )["ids"]
+            expected_ids = shards.get(name, {}).get("ids", [])
+            stale_ids = list(set(existing_ids) - set(expected_ids))
+            if stale_ids:
+                print(f"Removing {len(stale_ids)} stale documents from {name}...")
+                collection.delete(ids=stale_ids)
+
+    # Chroma automatically persists changes to the directory, so no explicit save is needed.
+    bump_collection_version(DOCS_COLLECTION)
+    print(f"Vector database at {vector_db_path} is up to date ({len(shards)} shards).")
+    return load_vector_db(vector_db_path, next(iter(shards)))
+
+
+def load_vector_db(
+    vector_db_path=CHROMA_DB_PATH, collection_name=DOCS_COLLECTION_PREFIX
+):
+    """Load one collection of the ChromaDB vector database from a persistent directory."""
+    from langchain_community.vectorstores import Chroma
+    from llms import embeddings
 
     try:
         # Simply instantiate Chroma with the path and embedding function to load it.
         vector_store = Chroma(
-            persist_directory=vector_db_path, embedding_function=embeddings
+            collection_name=collection_name,
+            persist_directory=vector_db_path,
+            embedding_function=embeddings,
         )
         print("ChromaDB vector database loaded successfully!")
         return vector_store
@@ -217,18 +617,19 @@ def load_vector_db(vector_db_path=CHROMA_DB_PATH):
 def get_all_documents(query: str, incident_number: Optional[str] = None):
     """
     Get all documents from the vector database, with an optional filter.
+    Results are served from the retrieval cache until the docs change.
     """
-    vector_store = load_vector_db(CHROMA_DB_PATH)
-    if not vector_store:
-        return None
-
     k_value = 2
     question = query
+    use_chunks = INGESTION_MODE == "field_chunks"
 
     # Build a list of conditions for the filter
-    conditions = [{"type": {"$eq": "doc"}}]
+    conditions = [{"type": {"$eq": "chunk" if use_chunks else "doc"}}]
 
     if incident_number:
+        member = get_member_document(incident_number)
+        if member is not None:
+            return [member]
         question = incident_number
         conditions.append({"incident_number": {"$eq": incident_number.lower()}})
         k_value = 8
@@ -239,31 +640,102 @@ def get_all_documents(query: str, incident_number: Optional[str] = None):
     else:
         filter_criteria = {"$and": conditions}  # ✅ dict with $and
 
-    all_docs = vector_store.similarity_search(
-        question,
-        k=k_value,
-        filter=filter_criteria,
+    def search():
+        try:
+            shards = list_shards(CHROMA_DB_PATH)
+        except Exception as e:
+            print(f"Error loading ChromaDB vector database: {e}")
+            return None
+        if incident_number:
+            shards = shards_for_incident(incident_number, shards)
+
+        if use_chunks:
+            # Match against chunks, then hand back only the matched parent fields
+            chunks = search_shards(shards, question, k_value * 4, filter_criteria)
+            return assemble_parent_documents(chunks, max_parents=k_value)
+        return search_shards(shards, question, k_value, filter_criteria)
+
+    cache_key = (
+        normalize_query(question),
+        json.dumps(filter_criteria, sort_keys=True),
+        k_value,
     )
-    return all_docs
+    return retrieval_cache.fetch(DOCS_COLLECTION, cache_key, search)
 
 
-def get_all_feedbacks(query: str) -> Optional[List[Document]]:
+def search_shards(shards: List[str], question: str, k: int, filter_criteria: dict):
     """
-    Get all documents of type 'feedback' from the vector database.
+    Scatter-gather search: the question is embedded once, every shard is
+    searched in parallel and the k closest entries overall are returned.
     """
-    vector_store = load_vector_db(CHROMA_DB_PATH)
-    if not vector_store:
-        print("Vector database not found.")
+    if not shards:
+        return []
+
+    from llms import embeddings
+
+    embedding = embeddings.embed_query(question)
+
+    def search_shard(name):
+        vector_store = load_vector_db(CHROMA_DB_PATH, name)
+        if vector_store is None:
+            return []
+        return vector_store.similarity_search_by_vector_with_relevance_scores(
+            embedding, k=k, filter=filter_criteria
+        )
+
+    if len(shards) == 1:
+        # Nothing to fan out; skip the thread hop
+        results = [search_shard(shards[0])]
+    else:
+        results = _search_pool.map(search_shard, shards)
+    # Scores are distances: smaller is closer
+    scored = sorted(
+        (pair for shard_results in results for pair in shard_results),
+        key=lambda pair: pair[1],
+    )
+    return [doc for doc, _ in scored[:k]]
+
+
+def get_member_document(incident_number: str) -> Optional[Document]:
+    """
+    A ticket collapsed into a near-duplicate cluster has no vectors of its own;
+    it is rebuilt from its ticket store record, noting its representative.
+    """
+    number = incident_number.lower()
+    representative = get_representatives([number]).get(number)
+    if representative in (None, number):
         return None
 
+    ticket = get_tickets([number])[number]
+    document = create_document_from_row(ticket, 0)
+    document.page_content += (
+        f"HAS_DUPLICATE_OF: For incident number:{number} -> "
+        f"Near duplicate of: {representative}\n"
+    )
+    return slim_document(document)
+
+
+def get_all_feedbacks(query: str) -> Optional[List[Document]]:
+    """
+    Get all documents of type 'feedback' from the vector database.
+    """
     # Single predicate can be passed directly; $eq is fine but not required for equality
     filter_criteria = {"type": {"$eq": "feedback"}}
 
-    all_feedbacks = vector_store.similarity_search(
-        query,
-        k=2,
-        filter=filter_criteria,
-    )
+    def search():
+        vector_store = load_vector_db(CHROMA_DB_PATH, FEEDBACK_COLLECTION_NAME)
+        if vector_store is None:
+            print("Vector database not found.")
+            return None
+
+        all_feedbacks = vector_store.similarity_search(
+            query,
+            k=2,
+            filter=filter_criteria,
+        )
+
+        # print(f"Found {len(all_feedbacks)} feedback documents.")
+        return all_feedbacks
 
-    # print(f"Found {len(all_feedbacks)} feedback documents.")
-    return all_feedbacks
+    cache_key = (normalize_query(query), json.dumps(filter_criteria), 2)
+    return retrieval_cache.fetch(FEEDBACK_COLLECTION, cache_key, search)
@@ -0,0 +1,11 @@
+import math
+import re
+
+# Shared by the request path and background jobs; keep it free of app imports
+INCIDENT_NUMBER_PATTERN = re.compile(r"\binc\d+\b", re.IGNORECASE)
+
+
+def cosine_similarity(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
@@ -0,0 +1,142 @@
+import sqlite3
+import threading
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional
+
+from app.config import TICKET_STORE_PATH
+
+# Every ticket field, in the order create_documents_from_excel produces them
+TICKET_FIELDS = [
+    "incident_number",
+    "location",
+    "title",
+    "description",
+    "priority",
+    "caller",
+    "assignment_group",
+    "assigned_to",
+    "state",
+    "created",
+    "updated",
+    "close_notes",
+    "resolved_time",
+    "updated_by",
+    "work_notes",
+    "category",
+    "additional_comments",
+]
+
+
+# Store paths whose schema this process has already set up
+_schema_ready = set()
+_schema_lock = threading.Lock()
+
+
+def create_schema(store_path: str = TICKET_STORE_PATH):
+    """Creates the tickets table and its indexes, upgrading older stores."""
+    columns = ", ".join(
+        f"{field} TEXT PRIMARY KEY" if field == "incident_number" else f"{field} TEXT"
+        for field in TICKET_FIELDS
+    )
+    with closing(sqlite3.connect(store_path, timeout=30)) as connection, connection:
+        connection.execute(f"CREATE TABLE IF NOT EXISTS tickets ({columns})")
+        existing = {row[1] for row in connection.execute("PRAGMA table_info(tickets)")}
+        if "representative" not in existing:
+            # Incident number of the ticket's near-duplicate cluster representative
+            try:
+                connection.execute("ALTER TABLE tickets ADD COLUMN representative TEXT")
+            except sqlite3.OperationalError as e:
+                # Another process upgraded the store first
+                if "duplicate column" not in str(e):
+                    raise
+        # For the aggregate queries of app/analytics.py
+        for field in ("state", "priority", "assignment_group", "created"):
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS tickets_{field} ON tickets ({field})"
+            )
+    _schema_ready.add(store_path)
+
+
+def connect(store_path: str = TICKET_STORE_PATH) -> sqlite3.Connection:
+    """Plain connection; the schema is only set up on the first call per process."""
+    if store_path not in _schema_ready:
+        with _schema_lock:
+            if store_path not in _schema_ready:
+                create_schema(store_path)
+    connection = sqlite3.connect(store_path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def save_tickets(
+    tickets: Iterable[dict],
+    replace_all: bool = False,
+    store_path: str = TICKET_STORE_PATH,
+):
+    """
+    Upserts full ticket records keyed by incident number. With `replace_all`
+    the table ends up holding exactly `tickets`.
+    """
+    columns = [*TICKET_FIELDS, "representative"]
+    rows = [
+        (
+            *(str(ticket[field]) for field in TICKET_FIELDS),
+            ticket.get("representative", ticket["incident_number"]),
+        )
+        for ticket in tickets
+    ]
+    placeholders = ", ".join("?" for _ in columns)
+    if replace_all:
+        # Full ingestion: (re)create the schema, e.g. for a deleted store
+        create_schema(store_path)
+    with closing(connect(store_path)) as connection, connection:
+        if replace_all:
+            connection.execute("DELETE FROM tickets")
+        connection.executemany(
+            f"INSERT OR REPLACE INTO tickets ({', '.join(columns)}) "
+            f"VALUES ({placeholders})",
+            rows,
+        )
+    print(f"Stored {len(rows)} ticket records in {store_path}")
+
+
+def get_tickets(
+    incident_numbers: List[str],
+    fields: Optional[List[str]] = None,
+    store_path: str = TICKET_STORE_PATH,
+) -> Dict[str, dict]:
+    """Fetches the requested fields of the given tickets, keyed by incident number."""
+    fields = [f for f in (fields or TICKET_FIELDS) if f in TICKET_FIELDS]
+    numbers = [n.lower() for n in incident_numbers]
+    if not numbers:
+        return {}
+
+    columns = ", ".join(dict.fromkeys(["incident_number", *fields]))
+    placeholders = ", ".join("?" for _ in numbers)
+    with closing(connect(store_path)) as connection:
+        rows = connection.execute(
+            f"SELECT {columns} FROM tickets WHERE incident_number IN ({placeholders})",
+            numbers,
+        ).fetchall()
+    return {row["incident_number"]: {f: row[f] for f in fields} for row in rows}
+
+
+def get_representatives(
+    incident_numbers: List[str], store_path: str = TICKET_STORE_PATH
+) -> Dict[str, str]:
+    """Maps each known incident number to its cluster representative."""
+    numbers = [n.lower() for n in incident_numbers]
+    if not numbers:
+        return {}
+
+    placeholders = ", ".join("?" for _ in numbers)
+    with closing(connect(store_path)) as connection:
+        rows = connection.execute(
+            "SELECT incident_number, representative FROM tickets "
+            f"WHERE incident_number IN ({placeholders})",
+            numbers,
+        ).fetchall()
+    return {
+        row["incident_number"]: row["representative"] or row["incident_number"]
+        for row in rows
+    }
@@ -1,20 +1,99 @@
+from typing import List
 from langchain_ollama import ChatOllama, OllamaEmbeddings
+from langchain_core.embeddings import Embeddings
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
 
-llm = ChatOllama(
-    model="gemma3:latest",
-    temperature=0.1,
-    base_url="http://localhost:11434",
+from app.config import (
+    CHAT_MODEL,
+    EMBEDDING_MODEL,
+    OLLAMA_MAX_CONCURRENCY,
+    OLLAMA_CHAT_ENDPOINTS,
+    OLLAMA_EMBED_ENDPOINTS,
+    OLLAMA_HEALTH_CHECK_SECONDS,
+    OLLAMA_KEEP_ALIVE_SECONDS,
+    OLLAMA_ROUTING,
+)
+from app.ollama_pool import OllamaPool
+from app.scheduler import get_scheduler
+
+chat_pool = OllamaPool(
+    "chat",
+    OLLAMA_CHAT_ENDPOINTS,
+    lambda url: ChatOllama(
+        model=CHAT_MODEL,
+        temperature=0.1,
+        base_url=url,
+        keep_alive=OLLAMA_KEEP_ALIVE_SECONDS,
+    ),
+    routing=OLLAMA_ROUTING,
+    # More healthy hosts, more calls in flight
+    on_health_change=lambda healthy: get_scheduler(CHAT_MODEL).resize(
+        healthy * OLLAMA_MAX_CONCURRENCY[CHAT_MODEL]
+    ),
 )
 
 
-embeddings = OllamaEmbeddings(
-    model="embeddinggemma:latest",
-    base_url="http://localhost:11434",
+embedding_pool = OllamaPool(
+    "embedding",
+    OLLAMA_EMBED_ENDPOINTS,
+    lambda url: OllamaEmbeddings(
+        model=EMBEDDING_MODEL,
+        base_url=url,
+        keep_alive=OLLAMA_KEEP_ALIVE_SECONDS,
+    ),
+    routing=OLLAMA_ROUTING,
+    on_health_change=lambda healthy: get_scheduler(EMBEDDING_MODEL).resize(
+        healthy * OLLAMA_MAX_CONCURRENCY[EMBEDDING_MODEL]
+    ),
 )
 
 
+def _invoke_chat_model(messages, config):
+    """Every chain reaches Ollama through here, one scheduler slot per call."""
+    with get_scheduler(CHAT_MODEL).slot():
+        return chat_pool.run(lambda chat_model: chat_model.invoke(messages, config))
+
+
+llm = RunnableLambda(_invoke_chat_model, name="ChatOllama")
+
+
+class ScheduledEmbeddings(Embeddings):
+    """Routes embedding calls through the embedding model's scheduler and pool."""
+
+    def __init__(self, pool: OllamaPool, model: str):
+        self.pool = pool
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with get_scheduler(self.model).slot():
+            return self.pool.run(lambda client: client.embed_documents(texts))
+
+    def embed_query(self, text: str) -> List[float]:
+        with get_scheduler(self.model).slot():
+            return self.pool.run(lambda client: client.embed_query(text))
+
+
+embeddings = ScheduledEmbeddings(embedding_pool, EMBEDDING_MODEL)
+
+
+def warm_up_models() -> bool:
+    """
+    Checks every Ollama host and loads the chat and embedding models into
+    memory, so the first real request does not pay for model loading.
+    """
+    chat_ready = chat_pool.check_health() and chat_pool.warm_up(
+        lambda chat_model: chat_model.invoke("ping")
+    )
+    embedding_ready = embedding_pool.check_health() and embedding_pool.warm_up(
+        lambda client: client.embed_query("ping")
+    )
+    chat_pool.start_health_checks(OLLAMA_HEALTH_CHECK_SECONDS)
+    embedding_pool.start_health_checks(OLLAMA_HEALTH_CHECK_SECONDS)
+    return chat_ready and embedding_ready
+
+
 # prompt = ChatPromptTemplate.from_template("""here is the query: {input}""")
 
 # chain = prompt | llm | StrOutputParser()
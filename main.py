@@ -1,12 +1,73 @@
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 import logging
 from app.api.rag import router
-from app.services import create_documents_from_excel, create_and_save_vector_db
-from app.config import EXCEL_PATH
+from app.change_feed import start_change_feed
+from app.config import (
+    CHANGE_FEED_IN_APP,
+    CHANGE_FEED_PATH,
+    EXCEL_PATH,
+    FEEDBACK_COMPACTION_SECONDS,
+    OLLAMA_HEALTH_CHECK_SECONDS,
+)
+from app.feedback_compaction import start_feedback_compaction
+from app.ingestion import ingest_if_changed, load_manifest
+from app.scheduler import Priority, request_priority
 import uvicorn
 
-rag_app = FastAPI()
+# Progress of the background startup work, reported by /readyz
+startup_status = {"models": "pending", "ingestion": "pending"}
+
+
+async def warm_up_in_background():
+    from llms import warm_up_models
+
+    # Compile the graph now rather than on the first request
+    await asyncio.to_thread(importlib.import_module, "app.graph.workflow")
+
+    while not await asyncio.to_thread(warm_up_models):
+        startup_status["models"] = "unavailable"
+        print("Ollama warmup incomplete; retrying.")
+        await asyncio.sleep(OLLAMA_HEALTH_CHECK_SECONDS)
+    startup_status["models"] = "ready"
+
+
+async def ingest_in_background():
+    startup_status["ingestion"] = "running"
+    try:
+        # The worker thread inherits the priority, so user queries go first
+        with request_priority(Priority.BATCH):
+            startup_status["ingestion"] = await asyncio.to_thread(
+                ingest_if_changed, EXCEL_PATH
+            )
+    except Exception as e:
+        print(f"Ingestion failed: {e}")
+        startup_status["ingestion"] = "failed"
+
+    # Live updates start after the full ingestion, which would overwrite them
+    if CHANGE_FEED_PATH and CHANGE_FEED_IN_APP:
+        start_change_feed(CHANGE_FEED_PATH)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Heavy work runs after the server is up; /readyz reports when it is done
+    tasks = [
+        asyncio.create_task(warm_up_in_background()),
+        asyncio.create_task(ingest_in_background()),
+    ]
+    if FEEDBACK_COMPACTION_SECONDS > 0:
+        start_feedback_compaction(FEEDBACK_COMPACTION_SECONDS)
+    yield
+    for task in tasks:
+        task.cancel()
+
+
+rag_app = FastAPI(lifespan=lifespan)
 
 # CORS middleware
 rag_app.add_middleware(
@@ -22,16 +83,24 @@ rag_app.include_router(router, prefix="/rag-api")
 logger = logging.getLogger(__name__)
 
 
-if __name__ == "__main__":
-    # excel_path = os.path.join("data", "Incident_Data.xlsx")
-    documents = create_documents_from_excel(EXCEL_PATH)
+@rag_app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving HTTP."""
+    return {"status": "ok"}
 
-    if not documents:
-        print("No documents created. Exiting.")
 
-    # Create and save vector database
-    vector_store = create_and_save_vector_db(documents)
+@rag_app.get("/readyz")
+def readyz():
+    """Readiness: models are warm and a vector database has been ingested."""
+    has_data = startup_status["ingestion"] in ("skipped", "ingested") or (
+        load_manifest() is not None
+    )
+    ready = startup_status["models"] == "ready" and has_data
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, **startup_status},
+    )
 
-    print("Vector database creation completed!")
 
+if __name__ == "__main__":
     uvicorn.run(rag_app, host="0.0.0.0", port=8010)
@@ -0,0 +1,102 @@
+import pytest
+from pydantic import ValidationError
+
+from app.analytics import build_analytics_sql, run_analytics_query
+from app.graph.schemas import AnalyticsQuery
+from app.ticket_store import TICKET_FIELDS, save_tickets
+
+
+def ticket(incident_number, **fields):
+    record = {field: "nan" for field in TICKET_FIELDS}
+    record.update(incident_number=incident_number, **fields)
+    return record
+
+
+def test_filters_are_bound_as_parameters():
+    sql, params = build_analytics_sql(
+        {"metric": "count", "filters": {"priority": ["1 - Critical", "2 - High"]}}
+    )
+    assert (
+        sql == "SELECT COUNT(*) AS incident_count FROM tickets WHERE priority IN (?, ?)"
+    )
+    assert params == ["1 - critical", "2 - high"]
+
+
+def test_unknown_columns_and_metrics_are_ignored():
+    sql, params = build_analytics_sql(
+        {
+            "metric": "drop table",
+            "filters": {"title; --": "x", "state": "closed"},
+            "group_by": "title",
+            "date_field": "incident_number",
+            "within_days": "soon",
+        }
+    )
+    assert sql == "SELECT COUNT(*) AS incident_count FROM tickets WHERE state IN (?)"
+    assert params == ["closed"]
+
+
+def test_group_by_and_date_window():
+    sql, params = build_analytics_sql(
+        {
+            "metric": "avg_resolution_hours",
+            "group_by": "assignment_group",
+            "date_field": "resolved_time",
+            "within_days": 7,
+        }
+    )
+    assert "julianday(resolved_time) >= julianday('now', ?)" in sql
+    assert "GROUP BY assignment_group" in sql
+    assert params == ["-7 days"]
+
+
+def test_empty_filters_and_negative_windows_are_ignored():
+    sql, params = build_analytics_sql(
+        {"filters": {"state": [], "priority": "1 - critical"}, "within_days": -5}
+    )
+    assert sql == "SELECT COUNT(*) AS incident_count FROM tickets WHERE priority IN (?)"
+    assert params == ["1 - critical"]
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"metric": "count", "within_days": -5},
+        {"metric": "count", "within_days": 0},
+        {"metric": "count", "filters": {"state": []}},
+    ],
+)
+def test_schema_rejects_specs_that_would_match_nothing(spec):
+    with pytest.raises(ValidationError):
+        AnalyticsQuery.model_validate(spec)
+
+
+def test_unnormalized_columns_are_lowercased_in_sql():
+    sql, params = build_analytics_sql({"filters": {"updated_by": "Admin"}})
+    assert "lower(updated_by) IN (?)" in sql
+    assert params == ["admin"]
+
+
+def test_run_analytics_query_counts_matching_tickets(tmp_path):
+    store_path = str(tmp_path / "tickets.sqlite3")
+    save_tickets(
+        [
+            ticket("inc1", priority="1 - critical", state="closed"),
+            ticket("inc2", priority="1 - critical", state="new"),
+            ticket("inc3", priority="3 - moderate", state="closed"),
+        ],
+        replace_all=True,
+        store_path=store_path,
+    )
+    rows = run_analytics_query(
+        {
+            "metric": "count",
+            "group_by": "state",
+            "filters": {"priority": "1 - Critical"},
+        },
+        store_path,
+    )
+    assert sorted((row["state"], row["incident_count"]) for row in rows) == [
+        ("closed", 1),
+        ("new", 1),
+    ]
@@ -0,0 +1,54 @@
+import json
+
+from app import change_feed
+from app.change_feed import _complete_csv_records, read_new_rows
+
+
+def test_complete_csv_records_keeps_whole_records():
+    data = b'inc1,"one"\ninc2,"two\nlines"\ninc3,"not yet\n'
+    assert _complete_csv_records(data) == b'inc1,"one"\ninc2,"two\nlines"\n'
+
+
+def test_complete_csv_records_handles_escaped_quotes():
+    data = b'inc1,"say ""hi"""\ninc2,"open\n'
+    assert _complete_csv_records(data) == b'inc1,"say ""hi"""\n'
+
+
+def test_read_new_rows_waits_for_a_whole_jsonl_line(tmp_path):
+    path = tmp_path / "feed.jsonl"
+    path.write_text('{"incident_number": "INC1"}\n{"incident_number": "IN')
+    rows, offset = read_new_rows(str(path), 0)
+    assert rows == [{"incident_number": "INC1"}]
+    assert offset == len('{"incident_number": "INC1"}\n')
+
+    with open(path, "a") as f:
+        f.write('C2"}\n')
+    rows, offset = read_new_rows(str(path), offset)
+    assert rows == [{"incident_number": "INC2"}]
+    assert offset == path.stat().st_size
+
+
+def test_read_new_rows_skips_lines_that_are_not_objects(tmp_path):
+    path = tmp_path / "feed.jsonl"
+    path.write_text('[1, 2]\n"x"\nnot json\n{"incident_number": "INC1"}\n')
+    rows, offset = read_new_rows(str(path), 0)
+    assert rows == [{"incident_number": "INC1"}]
+    assert offset == path.stat().st_size
+
+
+def test_read_new_rows_parses_multiline_csv_values(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text('incident_number,work_notes\ninc1,"first\nsecond"\ninc2,"open\n')
+    rows, offset = read_new_rows(str(path), 0)
+    assert rows == [{"incident_number": "inc1", "work_notes": "first\nsecond"}]
+    assert offset == len('incident_number,work_notes\ninc1,"first\nsecond"\n')
+
+
+def test_read_new_rows_reads_past_the_chunk_size(tmp_path, monkeypatch):
+    monkeypatch.setattr(change_feed, "READ_CHUNK_BYTES", 16)
+    path = tmp_path / "feed.jsonl"
+    row = {"incident_number": "INC1", "work_notes": "w" * 200}
+    path.write_text(json.dumps(row) + "\n")
+    rows, offset = read_new_rows(str(path), 0)
+    assert rows == [row]
+    assert offset == path.stat().st_size
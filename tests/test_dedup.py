@@ -0,0 +1,26 @@
+from app.dedup import find_near_duplicate_clusters
+
+
+def ticket(title, description="", close_notes=""):
+    return {"title": title, "description": description, "close_notes": close_notes}
+
+
+def test_near_duplicates_share_a_cluster():
+    description = "users on the third floor cannot connect to the corporate vpn since this morning"
+    tickets = [
+        ticket("VPN down", description, "restarted the vpn gateway"),
+        ticket("Printer jam", "the printer in room 4 keeps jamming on every job"),
+        ticket("VPN down", description + " today", "restarted the vpn gateway"),
+    ]
+    clusters = find_near_duplicate_clusters(tickets, threshold=0.7)
+    assert sorted(clusters) == [[0, 2], [1]]
+
+
+def test_distinct_and_empty_tickets_stay_apart():
+    tickets = [
+        ticket("Email bounce", "outgoing mail to partners bounces with 550"),
+        ticket("Disk full", "the build server ran out of disk space overnight"),
+        ticket("nan", "nan", "nan"),
+        ticket("nan", "nan", "nan"),
+    ]
+    assert sorted(find_near_duplicate_clusters(tickets)) == [[0], [1], [2], [3]]
@@ -0,0 +1,33 @@
+from app.feedback_compaction import _feedback_fields, find_incident_numbers
+
+
+def test_find_incident_numbers_is_sorted_and_lowercased():
+    assert find_incident_numbers("See INC2 and inc1", None, "inc2 again") == "inc1,inc2"
+
+
+def test_grouping_ignores_incidents_only_mentioned_in_the_answer():
+    entries = [
+        _feedback_fields(
+            content,
+            {"user_query": "Why did INC1 fail?", "feedback": "Missing the root cause"},
+        )
+        for content in (
+            "Provided Content: 'INC1 failed like INC2 did.'",
+            "Provided Content: 'INC1 failed after a patch.'",
+        )
+    ]
+    assert [entry["incident_numbers"] for entry in entries] == ["inc1", "inc1"]
+
+
+def test_legacy_entries_are_parsed_from_the_text():
+    content = (
+        "A user provided feedback on an incident query. "
+        "User's Query: 'status of inc7'. "
+        "Provided Content: 'inc7 is resolved, unlike inc8'. "
+        "User's Feedback: 'correct'."
+    )
+    fields = _feedback_fields(content, {})
+    assert fields["user_query"] == "status of inc7"
+    assert fields["feedback"] == "correct"
+    assert fields["incident_numbers"] == "inc7"
+    assert fields["feedback_count"] == 1
@@ -0,0 +1,108 @@
+import socket
+import threading
+
+import httpx
+import pytest
+from langchain_ollama import OllamaEmbeddings
+
+from app.ollama_pool import OllamaPool
+from tools.ollama_stub import StubSettings, start_stub_server
+
+
+@pytest.fixture
+def stub_urls():
+    servers = [start_stub_server(StubSettings(embed_latency=0)) for _ in range(2)]
+    yield [f"http://127.0.0.1:{server.server_address[1]}" for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def dead_url():
+    # A port that was free a moment ago; nothing listens on it
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def make_pool(urls, routing="least_loaded", on_health_change=None):
+    return OllamaPool(
+        "embedding",
+        urls,
+        lambda url: OllamaEmbeddings(model="stub", base_url=url),
+        routing=routing,
+        on_health_change=on_health_change,
+    )
+
+
+def embed_on(client):
+    """Embeds a short text and returns the host that served it."""
+    assert client.embed_query("ping")
+    return client.base_url
+
+
+def test_round_robin_alternates_hosts(stub_urls):
+    pool = make_pool(stub_urls, routing="round_robin")
+    served = [pool.run(embed_on) for _ in range(4)]
+    assert served == [stub_urls[0], stub_urls[1], stub_urls[0], stub_urls[1]]
+
+
+def test_least_loaded_avoids_busy_host(stub_urls):
+    pool = make_pool(stub_urls)
+    started, release = threading.Event(), threading.Event()
+
+    def hold(client):
+        started.set()
+        release.wait(5)
+        return client.base_url
+
+    busy = threading.Thread(target=pool.run, args=(hold,))
+    busy.start()
+    started.wait(5)
+    try:
+        busy_url = next(e.url for e in pool.endpoints if e.in_flight)
+        assert pool.run(embed_on) != busy_url
+    finally:
+        release.set()
+        busy.join()
+
+
+def test_fails_over_to_next_host(stub_urls, dead_url):
+    healthy_counts = []
+    pool = make_pool(
+        [dead_url, stub_urls[0]],
+        routing="round_robin",
+        on_health_change=healthy_counts.append,
+    )
+    assert pool.run(embed_on) == stub_urls[0]
+    assert [e.healthy for e in pool.endpoints] == [False, True]
+    assert healthy_counts == [2, 1]
+
+
+def test_raises_when_every_host_is_down(dead_url):
+    pool = make_pool([dead_url])
+    with pytest.raises((ConnectionError, httpx.TransportError)):
+        pool.run(embed_on)
+
+
+def test_check_health_marks_hosts(stub_urls, dead_url):
+    healthy_counts = []
+    pool = make_pool([stub_urls[0], dead_url], on_health_change=healthy_counts.append)
+    assert pool.check_health(timeout=1)
+    assert [e.healthy for e in pool.endpoints] == [True, False]
+    assert pool.endpoints[1].last_error
+
+    pool.endpoints[1].url = stub_urls[1]
+    assert pool.check_health(timeout=1)
+    assert all(e.healthy for e in pool.endpoints)
+    assert healthy_counts == [2, 1, 2]
+
+
+def test_warm_up_skips_and_marks_failed_hosts(stub_urls, dead_url):
+    pool = make_pool([stub_urls[0], dead_url, stub_urls[1]])
+    pool.endpoints[2].healthy = False
+
+    assert pool.warm_up(embed_on)
+    assert [e.healthy for e in pool.endpoints] == [True, False, False]
@@ -0,0 +1,100 @@
+import threading
+import time
+
+import pytest
+
+from app.scheduler import (
+    ModelScheduler,
+    Priority,
+    SchedulerOverloaded,
+    request_priority,
+)
+
+
+def hold_slot(scheduler):
+    """Takes the scheduler's only slot in a thread; set the returned event to free it."""
+    acquired, release = threading.Event(), threading.Event()
+
+    def hold():
+        with scheduler.slot():
+            acquired.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    acquired.wait(5)
+    return release, thread
+
+
+def queue_call(scheduler, priority, order):
+    def call():
+        with request_priority(priority), scheduler.slot():
+            order.append(priority)
+
+    thread = threading.Thread(target=call)
+    thread.start()
+    return thread
+
+
+def wait_for_queue(scheduler, depth):
+    deadline = time.monotonic() + 5
+    while scheduler.metrics()["queue_depth"] < depth:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_free_slot_is_taken_without_waiting():
+    scheduler = ModelScheduler("model", max_concurrency=2, deadline_seconds=1)
+    with scheduler.slot(), scheduler.slot():
+        assert scheduler.metrics()["in_flight"] == 2
+    assert scheduler.metrics()["completed"] == 2
+
+
+def test_interactive_calls_run_before_queued_batch_calls():
+    scheduler = ModelScheduler("model", max_concurrency=1, deadline_seconds=30)
+    release, holder = hold_slot(scheduler)
+
+    order = []
+    threads = [queue_call(scheduler, Priority.FEEDBACK, order)]
+    wait_for_queue(scheduler, 1)
+    threads.append(queue_call(scheduler, Priority.BATCH, order))
+    wait_for_queue(scheduler, 2)
+    threads.append(queue_call(scheduler, Priority.INTERACTIVE, order))
+    wait_for_queue(scheduler, 3)
+
+    release.set()
+    for thread in [holder, *threads]:
+        thread.join(5)
+    assert order == [Priority.INTERACTIVE, Priority.BATCH, Priority.FEEDBACK]
+
+
+def test_rejects_calls_expected_to_wait_past_the_deadline():
+    scheduler = ModelScheduler("model", max_concurrency=1, deadline_seconds=0.5)
+    release, holder = hold_slot(scheduler)
+    try:
+        # The default service time estimate (1s) is already over the deadline
+        with pytest.raises(SchedulerOverloaded) as error:
+            with scheduler.slot():
+                pass
+        assert error.value.retry_after >= 1
+        assert scheduler.metrics()["rejected"] == 1
+    finally:
+        release.set()
+        holder.join(5)
+
+
+def test_resize_lets_waiting_calls_in():
+    scheduler = ModelScheduler("model", max_concurrency=1, deadline_seconds=30)
+    release, holder = hold_slot(scheduler)
+
+    order = []
+    waiter = queue_call(scheduler, Priority.BATCH, order)
+    wait_for_queue(scheduler, 1)
+    scheduler.resize(2)
+    waiter.join(5)
+    assert order == [Priority.BATCH]
+
+    release.set()
+    holder.join(5)
+    scheduler.resize(0)
+    assert scheduler.max_concurrency == 1
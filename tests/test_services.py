@@ -0,0 +1,23 @@
+from app.services import split_into_sections
+
+
+def test_short_text_is_one_section():
+    assert split_into_sections("Printer is jammed.", max_chars=50) == [
+        "Printer is jammed."
+    ]
+
+
+def test_long_text_splits_on_sentences():
+    text = "First sentence here. Second sentence here! Third one here? Fourth."
+    sections = split_into_sections(text, max_chars=45)
+    assert sections == [
+        "First sentence here. Second sentence here!",
+        "Third one here? Fourth.",
+    ]
+
+
+def test_overlong_sentence_is_broken_into_words():
+    text = " ".join(f"word{i}" for i in range(40))
+    sections = split_into_sections(text, max_chars=30)
+    assert all(len(section) <= 30 for section in sections)
+    assert " ".join(sections) == text
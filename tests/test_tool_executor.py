@@ -0,0 +1,21 @@
+from app.graph import tool_executor
+from app.graph.tool_executor import SharedRetrieval, run_query_feedback, run_queries
+
+
+def test_overlapping_queries_share_one_search(monkeypatch):
+    searched = []
+
+    def fake_search(query, incident_number=None):
+        searched.append(query)
+        return [f"result for {query}"]
+
+    monkeypatch.setattr(tool_executor, "get_all_documents", fake_search)
+    monkeypatch.setattr(tool_executor, "get_all_feedbacks", fake_search)
+    shared = SharedRetrieval()
+
+    first = run_queries(["VPN outage?"], shared=shared)
+    second = run_queries(["vpn   outage"], shared=shared)
+    run_query_feedback(["VPN outage?", "vpn outage!"], shared=shared)
+
+    assert first == second == [["result for VPN outage?"]]
+    assert searched == ["VPN outage?", "VPN outage?"]
@@ -0,0 +1,234 @@
+"""
+HTTP load test for rag_app against the Ollama stub server.
+
+Starts the stub and the FastAPI app (in a scratch working directory, so it
+ingests its own vector DB), waits for /readyz, then replays recorded
+conversations at the target concurrency and reports latency percentiles,
+throughput and error rates per endpoint.
+
+    python -m tools.load_test --concurrency 8 --repeat 5 --latency 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+import httpx
+
+from tools.ollama_stub import add_stub_arguments, settings_from_args, start_stub_server
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONVERSATIONS = os.path.join(
+    PROJECT_ROOT, "tools", "conversations_sample.jsonl"
+)
+
+
+def load_conversations(path: str) -> List[dict]:
+    """One JSON object per line: {"turns": [{"query": ..., "feedback": ...}, ...]}."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def start_app(app_port: int, stub_url: str, workdir: str) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "OLLAMA_CHAT_ENDPOINTS": stub_url,
+        "OLLAMA_EMBED_ENDPOINTS": stub_url,
+        "PYTHONPATH": PROJECT_ROOT,
+    }
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:rag_app",
+            "--app-dir",
+            PROJECT_ROOT,
+            "--port",
+            str(app_port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/readyz", timeout=2).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"App at {base_url} not ready after {timeout}s")
+
+
+class Recorder:
+    """Collects (latency, ok) samples per endpoint."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[tuple]] = defaultdict(list)
+
+    async def timed(self, client: httpx.AsyncClient, endpoint: str, payload: dict):
+        started = time.perf_counter()
+        try:
+            response = await client.post(endpoint, json=payload)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.samples[endpoint].append((time.perf_counter() - started, ok))
+        return response if ok else None
+
+    def report(self, elapsed: float) -> dict:
+        def percentile(values, p):
+            if not values:
+                return 0.0
+            values = sorted(values)
+            return values[min(len(values) - 1, int(p * len(values)))]
+
+        report = {}
+        for endpoint, samples in self.samples.items():
+            latencies = [latency for latency, ok in samples if ok]
+            errors = sum(1 for _, ok in samples if not ok)
+            report[endpoint] = {
+                "requests": len(samples),
+                "errors": errors,
+                "error_rate": round(errors / len(samples), 4),
+                "throughput_rps": round(len(samples) / elapsed, 2),
+                "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+                "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            }
+        return report
+
+
+async def replay_conversation(
+    client: httpx.AsyncClient, recorder: Recorder, conversation: dict
+):
+    """Plays the turns in order, carrying the session id between them."""
+    session_id = None
+    for turn in conversation["turns"]:
+        payload = {"query": turn["query"]}
+        if session_id:
+            payload["session_id"] = session_id
+        response = await recorder.timed(
+            client, "/rag-api/search_vector_documents", payload
+        )
+        if response is None:
+            return
+        body = response.json()
+        session_id = body["session_id"]
+
+        if turn.get("feedback"):
+            await recorder.timed(
+                client,
+                "/rag-api/incident_feedback",
+                {
+                    "user_query": turn["query"],
+                    "content": body["result"],
+                    "feedback": turn["feedback"],
+                },
+            )
+
+
+async def run_load(
+    base_url: str, conversations: List[dict], concurrency: int, repeat: int
+) -> dict:
+    recorder = Recorder()
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(repeat):
+        for conversation in conversations:
+            queue.put_nowait(conversation)
+
+    async def worker(client):
+        while not queue.empty():
+            await replay_conversation(client, recorder, queue.get_nowait())
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, timeout=300, limits=limits
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {"elapsed_seconds": round(elapsed, 2), "endpoints": recorder.report(elapsed)}
+
+
+def print_report(result: dict):
+    print(f"\nElapsed: {result['elapsed_seconds']}s")
+    header = f"{'endpoint':<36}{'reqs':>6}{'err%':>7}{'rps':>8}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in result["endpoints"].items():
+        print(
+            f"{endpoint:<36}{stats['requests']:>6}{stats['error_rate'] * 100:>6.1f}%"
+            f"{stats['throughput_rps']:>8}{stats['p50_ms']:>9}{stats['p95_ms']:>9}"
+            f"{stats['p99_ms']:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--conversations", default=DEFAULT_CONVERSATIONS)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--repeat", type=int, default=1, help="Times to replay the conversation set."
+    )
+    parser.add_argument("--app-port", type=int, default=8011)
+    parser.add_argument(
+        "--app-url",
+        help="Load an already running app instead of starting one with the stub.",
+    )
+    parser.add_argument("--ready-timeout", type=float, default=120.0)
+    parser.add_argument("--json", dest="json_path", help="Also write the report here.")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    conversations = load_conversations(args.conversations)
+    app_process = None
+
+    if args.app_url:
+        base_url = args.app_url
+    else:
+        stub = start_stub_server(settings_from_args(args))
+        stub_url = f"http://127.0.0.1:{stub.server_port}"
+        print(f"Ollama stub listening on {stub_url}")
+        workdir = tempfile.mkdtemp(prefix="rag-load-test-")
+        app_process = start_app(args.app_port, stub_url, workdir)
+        base_url = f"http://127.0.0.1:{args.app_port}"
+
+    try:
+        print(f"Waiting for {base_url}/readyz ...")
+        wait_until_ready(base_url, args.ready_timeout)
+        print(
+            f"Replaying {len(conversations)} conversations x{args.repeat} "
+            f"at concurrency {args.concurrency}"
+        )
+        result = asyncio.run(
+            run_load(base_url, conversations, args.concurrency, args.repeat)
+        )
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait()
+
+    print_report(result)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Ollama-compatible stub server for load testing without a GPU.
+
+Serves /api/chat, /api/generate, /api/embed, /api/embeddings and /api/tags
+with configurable latency and token rate. Chat replies are shaped after the
+prompt they answer, so the graph's parsers receive valid YES/NO,
+AnswerQuestion and VerificationModel output.
+
+    python -m tools.ollama_stub --port 11500 --latency 0.2 --tokens-per-second 40
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+INCIDENT_NUMBER_PATTERN = re.compile(r"\binc\d+\b", re.IGNORECASE)
+QUERY_PATTERN = re.compile(r"\*\*Current Query:\*\*\s*(.*?)\s*\*\*", re.S)
+
+FILLER_WORDS = (
+    "the incident was investigated by the support team and resolved after the "
+    "faulty component was replaced and service was restored for affected users"
+).split()
+
+
+class StubSettings:
+    def __init__(
+        self,
+        latency: float = 0.1,
+        tokens_per_second: float = 50.0,
+        answer_tokens: int = 60,
+        embed_latency: float = 0.01,
+        embedding_dim: int = 64,
+        insufficient_rate: float = 0.0,
+        follow_up_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.embed_latency = embed_latency
+        self.embedding_dim = embedding_dim
+        self.insufficient_rate = insufficient_rate
+        self.follow_up_rate = follow_up_rate
+
+
+def embed_text(text: str, dim: int):
+    """Deterministic unit vector from word hashes, so similar texts land close."""
+    vector = [0.0] * dim
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.md5(word.encode()).digest()
+        vector[digest[0] % dim] += 1.0 if digest[1] % 2 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def chat_reply(prompt: str, settings: StubSettings) -> str:
+    """Reply text matching what the prompt's parser expects."""
+    if "'YES' or 'NO'" in prompt:
+        return "YES" if random.random() < settings.follow_up_rate else "NO"
+
+    if "query_type" in prompt:
+        match = QUERY_PATTERN.search(prompt)
+        query = match.group(1).strip() if match else prompt[-200:]
+        numbers = sorted({n.upper() for n in INCIDENT_NUMBER_PATTERN.findall(query)})
+        return json.dumps(
+            {
+                "query_type": "needs_search",
+                "search_queries": [query[:120]],
+                "list_of_incident_numbers": numbers,
+            }
+        )
+
+    if "within_days" in prompt:
+        return json.dumps({"metric": "count", "filters": {}, "group_by": "priority"})
+
+    if "is_sufficient" in prompt:
+        if random.random() < settings.insufficient_rate:
+            return json.dumps(
+                {
+                    "is_sufficient": False,
+                    "reflection": "The answer is missing the resolution details.",
+                }
+            )
+        return json.dumps({"is_sufficient": True, "reflection": ""})
+
+    words = [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(settings.answer_tokens)]
+    return " ".join(words) + " [1]."
+
+
+def make_handler(settings: StubSettings):
+    class OllamaStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream_tokens(self, model: str, text: str, chat: bool):
+            """Streams `text` word by word as NDJSON at the configured token rate."""
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def write_line(payload: dict):
+                line = (json.dumps(payload) + "\n").encode()
+                self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                self.wfile.flush()
+
+            tokens = re.findall(r"\S+\s*", text) or [text]
+            delay = (
+                1.0 / settings.tokens_per_second if settings.tokens_per_second else 0
+            )
+            for token in tokens:
+                time.sleep(delay)
+                piece = {"role": "assistant", "content": token}
+                write_line(
+                    {
+                        "model": model,
+                        "created_at": datetime.now(timezone.utc).isoformat(),
+                        **({"message": piece} if chat else {"response": token}),
+                        "done": False,
+                    }
+                )
+            write_line(
+                {
+                    "model": model,
+                    "created_at": datetime.now(timezone.utc).isoformat(),
+                    **(
+                        {"message": {"role": "assistant", "content": ""}}
+                        if chat
+                        else {"response": ""}
+                    ),
+                    "done": True,
+                    "done_reason": "stop",
+                    "prompt_eval_count": 0,
+                    "eval_count": len(tokens),
+                }
+            )
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": []})
+            elif self.path == "/api/version":
+                self._send_json({"version": "0.0.0-stub"})
+            else:
+                self._send_json({})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            model = request.get("model", "stub")
+
+            if self.path in ("/api/embed", "/api/embeddings"):
+                time.sleep(settings.embed_latency)
+                texts = request.get("input", request.get("prompt", ""))
+                texts = texts if isinstance(texts, list) else [texts]
+                vectors = [embed_text(t, settings.embedding_dim) for t in texts]
+                if self.path == "/api/embeddings":
+                    self._send_json({"embedding": vectors[0]})
+                else:
+                    self._send_json({"model": model, "embeddings": vectors})
+                return
+
+            if self.path in ("/api/chat", "/api/generate"):
+                chat = self.path == "/api/chat"
+                if chat:
+                    prompt = "\n".join(
+                        m.get("content", "") for m in request.get("messages", [])
+                    )
+                else:
+                    prompt = request.get("prompt", "")
+                time.sleep(settings.latency)
+                reply = chat_reply(prompt, settings)
+                if request.get("stream", True):
+                    self._stream_tokens(model, reply, chat)
+                else:
+                    key = "message" if chat else "response"
+                    value = {"role": "assistant", "content": reply} if chat else reply
+                    self._send_json(
+                        {
+                            "model": model,
+                            key: value,
+                            "done": True,
+                            "done_reason": "stop",
+                        }
+                    )
+                return
+
+            self._send_json({})
+
+    return OllamaStubHandler
+
+
+def start_stub_server(
+    settings: StubSettings, host: str = "127.0.0.1", port: int = 0
+) -> ThreadingHTTPServer:
+    """Starts the stub in a daemon thread; port 0 picks a free port."""
+    server = ThreadingHTTPServer((host, port), make_handler(settings))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--latency", type=float, default=0.1, help="Seconds before the first token."
+    )
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--embed-latency", type=float, default=0.01)
+    parser.add_argument("--embedding-dim", type=int, default=64)
+    parser.add_argument(
+        "--insufficient-rate",
+        type=float,
+        default=0.0,
+        help="Share of verifications that ask for another revision.",
+    )
+    parser.add_argument(
+        "--follow-up-rate",
+        type=float,
+        default=0.0,
+        help="Share of follow-up checks answered YES.",
+    )
+
+
+def settings_from_args(args) -> StubSettings:
+    return StubSettings(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+        embed_latency=args.embed_latency,
+        embedding_dim=args.embedding_dim,
+        insufficient_rate=args.insufficient_rate,
+        follow_up_rate=args.follow_up_rate,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_stub_server(settings_from_args(args), args.host, args.port)
+    print(f"Ollama stub listening on http://{args.host}:{server.server_port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()